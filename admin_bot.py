@@ -1,12 +1,10 @@
 import asyncio
-import logging
 import os
 import sys
 import traceback
 from datetime import datetime, timedelta
 import io
 
-from dotenv import load_dotenv
 from aiogram import Bot, Dispatcher, Router
 from aiogram.types import Message, BufferedInputFile
 from aiogram.filters import Command, CommandStart
@@ -14,9 +12,10 @@ from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 
-from app import logger, ADMIN_PASSWORD, AUTHORIZED_ADMIN_IDS, DB_PATH
+from app import logger, ADMIN_PASSWORD, ADMIN_BOT_TOKEN, AUTHORIZED_ADMIN_IDS, DB_PATH
 from app.database import BotDatabase
 from app.google_maps import test_connection as test_google_maps_api
+from app.generators import get_http_client, close_http_client, create_bot_session
 from app.maps_static import create_static_map_url, get_static_map_image
 
 # States for authentication FSM
@@ -289,9 +288,6 @@ async def cmd_test_api(message: Message, state: FSMContext):
         google_maps_result = await test_google_maps_api()
         
         # Test Static Maps API
-        import httpx
-        from app.maps_static import create_static_map_url
-        
         # Test data for static map
         test_places = [
             {
@@ -304,37 +300,40 @@ async def cmd_test_api(message: Message, state: FSMContext):
             }
         ]
         
-        map_url = create_static_map_url(test_places)
+        test_position = test_places[0]["position"]
+        map_url = create_static_map_url(
+            test_places, test_position["lat"], test_position["lng"]
+        )
         
         if map_url:
             static_map_status = "✅ Google Maps Static API: Working"
             
             # Fetch map and send as photo
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(map_url)
+                client = await get_http_client()
+                response = await client.get(map_url)
+                
+                if response.status_code == 200:
+                    map_image = response.content
+                    await status_message.edit_text("🔍 API tests complete. See results below:")
+                    
+                    # Send test results as text
+                    api_status = (
+                        "🔌 <b>API Connection Tests</b>\n\n"
+                        f"{google_maps_result}\n\n"
+                        f"{static_map_status}"
+                    )
+                    await message.answer(api_status, parse_mode="HTML")
                     
-                    if response.status_code == 200:
-                        map_image = response.content
-                        await status_message.edit_text("🔍 API tests complete. See results below:")
-                        
-                        # Send test results as text
-                        api_status = (
-                            "🔌 <b>API Connection Tests</b>\n\n"
-                            f"{google_maps_result}\n\n"
-                            f"{static_map_status}"
-                        )
-                        await message.answer(api_status, parse_mode="HTML")
-                        
-                        # Send test map image
-                        photo = BufferedInputFile(map_image, filename="test_map.png")
-                        await message.answer_photo(
-                            photo=photo,
-                            caption="Test static map with two markers"
-                        )
-                        return
-                    else:
-                        static_map_status = f"❌ Google Maps Static API: Error (Status code: {response.status_code})"
+                    # Send test map image
+                    photo = BufferedInputFile(map_image, filename="test_map.png")
+                    await message.answer_photo(
+                        photo=photo,
+                        caption="Test static map with two markers"
+                    )
+                    return
+                else:
+                    static_map_status = f"❌ Google Maps Static API: Error (Status code: {response.status_code})"
             except Exception as e:
                 static_map_status = f"❌ Google Maps Static API: Error fetching map image - {str(e)}"
         else:
@@ -377,34 +376,49 @@ async def cmd_debug(message: Message):
     
     await message.answer(debug_info, parse_mode="HTML")
 
-async def main():
-    """Initialize and run the admin bot."""
+async def main(session=None):
+    """Initialize and run the admin bot.
+
+    A caller that passes a shared Telegram session also owns the shared
+    HTTP client and closes both itself.
+    """
     logger.info("Starting admin bot...")
+    owns_resources = session is None
     
     try:
         # Load token from environment variable
-        admin_bot_token = os.getenv("ADMIN_BOT_TOKEN")
+        admin_bot_token = ADMIN_BOT_TOKEN
         
         if not admin_bot_token:
             logger.error("ADMIN_BOT_TOKEN environment variable is not set")
             return
         
         # Initialize Bot instance
-        bot = Bot(token=admin_bot_token)
+        if owns_resources:
+            session = create_bot_session()
+        bot = Bot(token=admin_bot_token, session=session)
         
         # Initialize dispatcher with FSM storage
         dp = Dispatcher(storage=MemoryStorage())
         dp.include_router(router)
         
-        # Print startup message
-        me = await bot.get_me()
+        # Identify the bot and skip pending updates. bot.me() caches the
+        # identity, so polling reuses it instead of calling getMe again.
+        me, _ = await asyncio.gather(
+            bot.me(), bot.delete_webhook(drop_pending_updates=True)
+        )
         logger.info(f"Admin bot started as @{me.username} (ID: {me.id})")
         
-        # Skip pending updates and start polling
-        await bot.delete_webhook(drop_pending_updates=True)
-        await dp.start_polling(bot)
+        await dp.start_polling(
+            bot,
+            close_bot_session=owns_resources,
+            handle_signals=owns_resources,
+        )
     except Exception as e:
         logger.error(f"Admin bot error: {str(e)}", exc_info=True)
+    finally:
+        if owns_resources:
+            await close_http_client()
 
 if __name__ == "__main__":
     try:
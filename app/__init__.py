@@ -50,6 +50,10 @@ if missing_optional:
 # Initialize shared HTTP client
 http_client = None
 
+# Bot tokens
+TG_TOKEN = os.getenv("TG_TOKEN")
+ADMIN_BOT_TOKEN = os.getenv("ADMIN_BOT_TOKEN")
+
 # Database path
 DB_PATH = os.getenv("DB_PATH", "bot_stats.db")
 
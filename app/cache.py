@@ -0,0 +1,64 @@
+"""
+In-memory caching helpers.
+"""
+
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+
+class TTLCache(MutableMapping):
+    """Dictionary with a maximum size and a per-entry time to live.
+
+    Entries expire ``ttl`` seconds after they were last set. When the cache
+    is full, the least recently used entry is evicted.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+
+    def __getitem__(self, key):
+        stored_at, value = self._data[key]
+        if time.monotonic() - stored_at > self.ttl:
+            del self._data[key]
+            raise KeyError(key)
+
+        self._data.move_to_end(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._data[key] = (time.monotonic(), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __delitem__(self, key):
+        del self._data[key]
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def __iter__(self):
+        self.expire()
+        return iter(list(self._data))
+
+    def __len__(self):
+        self.expire()
+        return len(self._data)
+
+    def expire(self) -> None:
+        """Drop all expired entries."""
+        now = time.monotonic()
+        expired = [
+            key
+            for key, (stored_at, _) in self._data.items()
+            if now - stored_at > self.ttl
+        ]
+        for key in expired:
+            del self._data[key]
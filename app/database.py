@@ -1,6 +1,7 @@
 import sqlite3
 import os
-from datetime import datetime
+import json
+from datetime import datetime, timedelta
 from app import logger
 
 
@@ -56,6 +57,30 @@ class BotDatabase:
                 """
                 )
 
+                # Saved POI preferences
+                cursor.execute(
+                    """
+                CREATE TABLE IF NOT EXISTS user_preferences (
+                    user_id INTEGER PRIMARY KEY,
+                    preferences TEXT,
+                    updated_at TIMESTAMP
+                )
+                """
+                )
+
+                # Generated place histories shared across users
+                cursor.execute(
+                    """
+                CREATE TABLE IF NOT EXISTS place_histories (
+                    cache_key TEXT PRIMARY KEY,
+                    lang TEXT,
+                    history TEXT,
+                    voice_file_id TEXT,
+                    created_at TIMESTAMP
+                )
+                """
+                )
+
                 # Check if city column exists in searches table
                 cursor.execute("PRAGMA table_info(searches)")
                 columns = cursor.fetchall()
@@ -84,7 +109,7 @@ class BotDatabase:
                         "UPDATE users SET last_active = ?, username = ?, first_name = ?, last_name = ? WHERE user_id = ?",
                         (now, username, first_name, last_name, user_id),
                     )
-                    logger.debug(f"Updated user: {user_id}")
+                    logger.debug("Updated user: %s", user_id)
                 else:
                     cursor.execute(
                         "INSERT INTO users VALUES (?, ?, ?, ?, ?, ?)",
@@ -97,6 +122,35 @@ class BotDatabase:
             logger.error(f"Error adding/updating user {user_id}: {e}")
             return False
 
+    def get_user_preferences(self, user_id):
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT preferences FROM user_preferences WHERE user_id = ?",
+                    (user_id,),
+                )
+                row = cursor.fetchone()
+                return json.loads(row[0]) if row else None
+        except (sqlite3.Error, ValueError) as e:
+            logger.error(f"Error reading preferences for user {user_id}: {e}")
+            return None
+
+    def save_user_preferences(self, user_id, preferences):
+        now = datetime.now().isoformat()
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "INSERT OR REPLACE INTO user_preferences (user_id, preferences, updated_at) VALUES (?, ?, ?)",
+                    (user_id, json.dumps(preferences), now),
+                )
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error(f"Error saving preferences for user {user_id}: {e}")
+            return False
+
     def log_search(self, user_id, place_name, place_type, latitude, longitude, city=None):
         now = datetime.now().isoformat()
         try:
@@ -107,12 +161,84 @@ class BotDatabase:
                     (user_id, place_name, place_type, latitude, longitude, city, now),
                 )
                 conn.commit()
-                logger.debug(f"Logged search for {place_name} in {city} by user {user_id}")
+                logger.debug("Logged search for %s in %s by user %s", place_name, city, user_id)
                 return True
         except sqlite3.Error as e:
             logger.error(f"Error logging search: {e}")
             return False
 
+    def log_searches(self, rows):
+        """Log several searches in one transaction.
+
+        Each row is (user_id, place_name, place_type, latitude, longitude, city).
+        """
+        now = datetime.now().isoformat()
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.executemany(
+                    "INSERT INTO searches (user_id, place_name, place_type, latitude, longitude, city, search_time) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(*row, now) for row in rows],
+                )
+                conn.commit()
+                logger.debug("Logged %d searches", len(rows))
+                return True
+        except sqlite3.Error as e:
+            logger.error(f"Error logging searches: {e}")
+            return False
+
+    def get_place_history(self, cache_key, max_age_days=30):
+        """Return (history, voice_file_id) for a cached place history, or None."""
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT history, voice_file_id FROM place_histories WHERE cache_key = ? AND created_at >= ?",
+                    (cache_key, cutoff),
+                )
+                return cursor.fetchone()
+        except sqlite3.Error as e:
+            logger.error(f"Error reading place history: {e}")
+            return None
+
+    def save_place_history(self, cache_key, lang, history, voice_file_id=None):
+        now = datetime.now().isoformat()
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                # Refreshing a history keeps the voice file_id already stored
+                cursor.execute(
+                    """
+                    INSERT INTO place_histories (cache_key, lang, history, voice_file_id, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(cache_key) DO UPDATE SET
+                        history = excluded.history,
+                        voice_file_id = COALESCE(excluded.voice_file_id, voice_file_id),
+                        created_at = excluded.created_at
+                    """,
+                    (cache_key, lang, history, voice_file_id, now),
+                )
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error(f"Error saving place history: {e}")
+            return False
+
+    def save_place_history_voice(self, cache_key, voice_file_id):
+        try:
+            with sqlite3.connect(self.db_path) as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "UPDATE place_histories SET voice_file_id = ? WHERE cache_key = ?",
+                    (voice_file_id, cache_key),
+                )
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            logger.error(f"Error saving place history voice: {e}")
+            return False
+
     def get_user_count(self):
         try:
             with sqlite3.connect(self.db_path) as conn:
@@ -4,19 +4,50 @@ Generator functions for the Tourist Guide Bot.
 
 import os
 import asyncio
+import importlib.util
 import httpx
+import orjson
+from aiogram.client.session.aiohttp import AiohttpSession
+from collections import OrderedDict
+from typing import List, Dict
 from app import logger
-from app.languages import get_api_prompt, get_api_message
+from app.languages import get_api_prompt, get_api_message, format_api_prompt
 import re
 
+DEEPSEEK_API_URL = "https://api.deepseek.com/v1/chat/completions"
+
 # Global HTTP client for reuse
 _http_client = None
 
+# HTTP/2 lets parallel Google API calls share one TLS connection; it needs h2
+HTTP2_ENABLED = importlib.util.find_spec("h2") is not None
+
+# Cache of successful translations, oldest entries evicted first
+TRANSLATION_CACHE_SIZE = 4096
+_translation_cache: OrderedDict[str, str] = OrderedDict()
+# Translations currently in flight, shared by concurrent callers
+_pending_translations: Dict[str, asyncio.Task] = {}
+
+# Cap on concurrent non-streaming DeepSeek requests (mostly translations)
+DEEPSEEK_MAX_CONCURRENCY = 10
+_deepseek_semaphore = asyncio.Semaphore(DEEPSEEK_MAX_CONCURRENCY)
+
 
 async def init_http_client():
     global _http_client
     if _http_client is None:
-        _http_client = httpx.AsyncClient(timeout=30.0)
+        # Keep connections to the geocoder and translator warm between requests
+        # Long read timeout for DeepSeek completions, short connect timeout so a
+        # dead host fails fast
+        _http_client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED,
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=200,
+                max_keepalive_connections=100,
+                keepalive_expiry=300.0,
+            ),
+        )
     return _http_client
 
 
@@ -27,6 +58,19 @@ async def close_http_client():
         _http_client = None
 
 
+def create_bot_session() -> AiohttpSession:
+    """Create a Telegram API session that serializes payloads with orjson.
+
+    Inline keyboards are serialized into every send/edit call. One session
+    can be shared by several bots in the same process.
+    """
+    return AiohttpSession(json_loads=orjson.loads, json_dumps=_orjson_dumps)
+
+
+def _orjson_dumps(obj) -> str:
+    return orjson.dumps(obj).decode()
+
+
 async def get_http_client():
     global _http_client
     if _http_client is None:
@@ -44,7 +88,7 @@ def _get_api_key(key_name):
 async def deepseek_request(
     payload, max_retries=3, http_client: httpx.AsyncClient = None
 ):
-    url = "https://api.deepseek.com/v1/chat/completions"
+    url = DEEPSEEK_API_URL
     DEEPSEEK_API_KEY = _get_api_key("DEEPSEEK_API_KEY")
 
     if not DEEPSEEK_API_KEY:
@@ -68,10 +112,11 @@ async def deepseek_request(
                 f"Sending request to DeepSeek API (attempt {attempt+1}/{max_retries})"
             )
 
-            response = await client_to_use.post(
-                url, headers=headers, json=payload
-            )  # Use client_to_use
-            logger.debug(f"DeepSeek API response status: {response.status_code}")
+            async with _deepseek_semaphore:
+                response = await client_to_use.post(
+                    url, headers=headers, content=orjson.dumps(payload)
+                )
+            logger.debug("DeepSeek API response status: %s", response.status_code)
 
             if response.status_code == 401:
                 logger.error("Authentication error: Invalid API key")
@@ -89,7 +134,7 @@ async def deepseek_request(
                     return get_api_message("rate_limit_exceeded")
 
             elif response.status_code == 200:
-                response_data = response.json()
+                response_data = orjson.loads(response.content)
 
                 if "choices" in response_data and response_data["choices"]:
                     message = response_data["choices"][0].get("message", {})
@@ -139,6 +184,64 @@ async def deepseek_request(
     return get_api_message("multiple_failures")
 
 
+async def deepseek_stream_request(payload, http_client: httpx.AsyncClient = None):
+    """Stream content chunks from the DeepSeek API using server-sent events.
+
+    Raises if the request fails or the stream ends without a terminator.
+    """
+    DEEPSEEK_API_KEY = _get_api_key("DEEPSEEK_API_KEY")
+    if not DEEPSEEK_API_KEY:
+        return
+
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
+    }
+
+    client_to_use = http_client if http_client else await get_http_client()
+
+    async with client_to_use.stream(
+        "POST",
+        DEEPSEEK_API_URL,
+        headers=headers,
+        content=orjson.dumps({**payload, "stream": True}),
+    ) as response:
+        if response.status_code != 200:
+            await response.aread()
+            logger.error(
+                f"DeepSeek streaming error: {response.status_code} - {response.text[:200]}"
+            )
+            response.raise_for_status()
+
+        finished = False
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+
+            data = line[5:].strip()
+            if data == "[DONE]":
+                finished = True
+                break
+
+            try:
+                chunk = orjson.loads(data)
+            except ValueError:
+                logger.debug("Skipping malformed DeepSeek stream chunk: %.100s", data)
+                continue
+
+            choices = chunk.get("choices") or []
+            if choices:
+                content = choices[0].get("delta", {}).get("content")
+                if content:
+                    yield content
+                if choices[0].get("finish_reason"):
+                    finished = True
+
+        # A body that ends without a terminator is a cut-off answer
+        if not finished:
+            raise RuntimeError("DeepSeek stream ended before completion")
+
+
 async def test_deepseek_connection():
     simple_payload = {
         "model": "deepseek-chat",
@@ -152,15 +255,50 @@ async def test_deepseek_connection():
     return result
 
 
-async def translate_to_english(text: str):
-    if (
+def _skip_translation(text: str) -> bool:
+    return (
         not text
         or text.strip() == ""
         or text == get_api_message("address_not_specified")
         or text == get_api_message("address_not_available")
-    ):
+    )
+
+
+def _get_cached_translation(cache_key: str):
+    cached = _translation_cache.get(cache_key)
+    if cached is not None:
+        _translation_cache.move_to_end(cache_key)
+    return cached
+
+
+def _cache_translation(cache_key: str, translation: str) -> None:
+    _translation_cache[cache_key] = translation
+    if len(_translation_cache) > TRANSLATION_CACHE_SIZE:
+        _translation_cache.popitem(last=False)
+
+
+async def translate_to_english(text: str, http_client: httpx.AsyncClient = None):
+    if _skip_translation(text):
         return text
 
+    cache_key = text.strip()
+    cached = _get_cached_translation(cache_key)
+    if cached is not None:
+        return cached
+
+    task = _pending_translations.get(cache_key)
+    if task is None:
+        task = asyncio.create_task(_request_translation(text, cache_key, http_client))
+        _pending_translations[cache_key] = task
+        task.add_done_callback(lambda _: _pending_translations.pop(cache_key, None))
+
+    # Shield so one cancelled caller doesn't abort the request for the others
+    return await asyncio.shield(task)
+
+
+async def _request_translation(
+    text: str, cache_key: str, http_client: httpx.AsyncClient = None
+) -> str:
     payload = {
         "model": "deepseek-chat",
         "temperature": 0.3,
@@ -172,19 +310,145 @@ async def translate_to_english(text: str):
             },
             {
                 "role": "user",
-                "content": get_api_prompt("translate_prompt").format(text=text),
+                "content": format_api_prompt("translate_prompt", text=text),
             },
         ],
     }
 
-    result = await deepseek_request(payload)
+    result = await deepseek_request(payload, http_client=http_client)
     if result.startswith("Error:"):
         logger.error(f"Translation error: {result}")
         return text  # Return original text if translation fails
 
+    _cache_translation(cache_key, result)
     return result
 
 
+def _parse_batch_translation(result: str, expected: int):
+    """Extract a JSON array of translations from a model response."""
+    start, end = result.find("["), result.rfind("]")
+    if start == -1 or end <= start:
+        return None
+
+    try:
+        translations = orjson.loads(result[start : end + 1])
+    except ValueError:
+        return None
+
+    if (
+        not isinstance(translations, list)
+        or len(translations) != expected
+        or not all(isinstance(t, str) for t in translations)
+    ):
+        return None
+
+    return translations
+
+
+async def translate_to_english_batch(
+    texts: List[str], http_client: httpx.AsyncClient = None
+) -> List[str]:
+    """Translate several texts to English with a single DeepSeek request."""
+    results = list(texts)
+
+    # Map each uncached source text to the positions it appears at
+    missing: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        if _skip_translation(text):
+            continue
+
+        cache_key = text.strip()
+        cached = _get_cached_translation(cache_key)
+        if cached is not None:
+            results[i] = cached
+        else:
+            missing.setdefault(cache_key, []).append(i)
+
+    if not missing:
+        return results
+
+    sources = list(missing)
+    translations = None
+
+    if len(sources) > 1:
+        payload = {
+            "model": "deepseek-chat",
+            "temperature": 0.3,
+            "max_tokens": 1500,
+            "messages": [
+                {
+                    "role": "system",
+                    "content": get_api_prompt("translator_system_prompt"),
+                },
+                {
+                    "role": "user",
+                    "content": format_api_prompt(
+                        "translate_batch_prompt",
+                        texts=orjson.dumps(sources).decode(),
+                    ),
+                },
+            ],
+        }
+
+        result = await deepseek_request(payload, http_client=http_client)
+        if result.startswith("Error:"):
+            logger.error(f"Batch translation error: {result}")
+        else:
+            translations = _parse_batch_translation(result, len(sources))
+            if translations is None:
+                logger.warning(f"Unexpected batch translation response: {result[:200]}")
+            else:
+                for source, translation in zip(sources, translations):
+                    _cache_translation(source, translation)
+
+    if translations is None:
+        translations = await asyncio.gather(
+            *(translate_to_english(source, http_client) for source in sources)
+        )
+
+    for source, translation in zip(sources, translations):
+        for i in missing[source]:
+            results[i] = translation
+
+    return results
+
+
+def _build_location_prompts(
+    city: str,
+    street: str,
+    poi_name: str,
+    poi_address: str,
+    original_name: str = None,
+    lang: str = "en",
+):
+    """Build the system and user prompts for a location description."""
+    # Add context about original name if available
+    context = (
+        f"Note: The original name of this place is '{original_name}'."
+        if original_name
+        else ""
+    )
+
+    # Use language-specific system prompt
+    system_prompt = format_api_prompt(
+        f"location_system_prompt_{lang}",
+        city=city,
+        poi_name=poi_name,
+        poi_address=poi_address,
+        context=context,
+    )
+
+    user_prompt = format_api_prompt(
+        "location_user_prompt",
+        street=street,
+        city=city,
+        poi_name=poi_name,
+        poi_address=poi_address,
+    )
+
+    return system_prompt, user_prompt
+
+
 async def deepseek_location_info(
     city: str,
     street: str,
@@ -204,26 +468,8 @@ async def deepseek_location_info(
             logger.error(get_api_message("deepseek_api_key_error"))
             return None
 
-        # Add context about original name if available
-        context = (
-            f"Note: The original name of this place is '{original_name}'."
-            if original_name
-            else ""
-        )
-
-        # Use language-specific system prompt
-        system_prompt = get_api_prompt(f"location_system_prompt_{lang}").format(
-            city=city,
-            poi_name=poi_name,
-            poi_address=poi_address,
-            context=context,
-        )
-
-        user_prompt = get_api_prompt("location_user_prompt").format(
-            street=street,
-            city=city,
-            poi_name=poi_name,
-            poi_address=poi_address,
+        system_prompt, user_prompt = _build_location_prompts(
+            city, street, poi_name, poi_address, original_name, lang
         )
 
         payload = {
@@ -287,53 +533,102 @@ async def deepseek_location_info(
         return f"Error: {error_msg}"
 
 
-async def yandex_speechkit_tts(text: str, http_client=None, lang: str = "en") -> bytes:
-    """Convert text to speech using Yandex SpeechKit."""
-    try:
-        if not http_client:
-            http_client = await get_http_client()
+async def deepseek_location_info_stream(
+    city: str,
+    street: str,
+    poi_name: str,
+    poi_address: str,
+    original_name: str = None,
+    http_client=None,
+    lang: str = "en",
+):
+    """Stream location information from DeepSeek API chunk by chunk."""
+    system_prompt, user_prompt = _build_location_prompts(
+        city, street, poi_name, poi_address, original_name, lang
+    )
 
-        YA_SPEECHKIT_API_KEY = _get_api_key("YA_SPEECHKIT_API_KEY")
-        if not YA_SPEECHKIT_API_KEY:
-            logger.error(get_api_message("yandex_api_key_error"))
-            return None
+    payload = {
+        "model": "deepseek-chat",
+        "temperature": 0.7,
+        "max_tokens": 500,
+        "messages": [
+            {
+                "role": "system",
+                "content": system_prompt,
+            },
+            {
+                "role": "user",
+                "content": user_prompt,
+            },
+        ],
+    }
 
-        # Map language codes to Yandex voice models and language codes
-        voice_config = {
-            "en": {"voice": "john", "lang": "en-US"},
-            "ru": {"voice": "filipp", "lang": "ru-RU"},
-        }
+    async for chunk in deepseek_stream_request(payload, http_client=http_client):
+        yield chunk
 
-        # Get voice configuration based on language
-        config = voice_config.get(
-            lang, voice_config["en"]
-        )  # Default to English if language not supported
 
-        headers = {
-            "Authorization": f"Api-Key {YA_SPEECHKIT_API_KEY}",
-            "Content-Type": "application/x-www-form-urlencoded",
-        }
+TTS_URL = "https://tts.api.cloud.yandex.net/speech/v1/tts:synthesize"
 
-        data = {
-            "text": text,
-            "lang": config["lang"],  # Use proper language code
-            "voice": config["voice"],
-            "emotion": "good",
-            "format": "mp3",
-            "speed": "1.0",
-            "folderId": os.getenv("YA_CATALOG_ID", "b1gjn47rcuokgs8tfom5"),
-        }
 
-        url = "https://tts.api.cloud.yandex.net/speech/v1/tts:synthesize"
+def _build_tts_request(text: str, lang: str):
+    """Build streaming SpeechKit headers and form data, or None without an API key."""
+    YA_SPEECHKIT_API_KEY = _get_api_key("YA_SPEECHKIT_API_KEY")
+    if not YA_SPEECHKIT_API_KEY:
+        logger.error(get_api_message("yandex_api_key_error"))
+        return None
 
-        response = await http_client.post(url, headers=headers, data=data)
-        if response.status_code == 200:
-            return response.content
-        else:
+    # Map language codes to Yandex voice models and language codes
+    voice_config = {
+        "en": {"voice": "john", "lang": "en-US"},
+        "ru": {"voice": "filipp", "lang": "ru-RU"},
+    }
+
+    # Get voice configuration based on language
+    config = voice_config.get(
+        lang, voice_config["en"]
+    )  # Default to English if language not supported
+
+    headers = {
+        "Authorization": f"Api-Key {YA_SPEECHKIT_API_KEY}",
+        "Content-Type": "application/x-www-form-urlencoded",
+    }
+
+    data = {
+        "text": text,
+        "lang": config["lang"],  # Use proper language code
+        "voice": config["voice"],
+        "emotion": "good",
+        "format": "mp3",
+        "speed": "1.0",
+        "folderId": os.getenv("YA_CATALOG_ID", "b1gjn47rcuokgs8tfom5"),
+    }
+
+    return headers, data
+
+
+async def yandex_speechkit_tts_stream(text: str, http_client=None, lang: str = "en"):
+    """Stream synthesized speech from Yandex SpeechKit as it is produced.
+
+    Yields nothing if the request is rejected; network errors mid-stream
+    propagate so callers can tell truncated audio from a complete clip.
+    """
+    if not http_client:
+        http_client = await get_http_client()
+
+    request = _build_tts_request(text, lang)
+    if not request:
+        return
+    headers, data = request
+
+    async with http_client.stream(
+        "POST", TTS_URL, headers=headers, data=data
+    ) as response:
+        if response.status_code != 200:
+            await response.aread()
             logger.error(
-                f"SpeechKit TTS error: {response.status_code} - {response.text}"
+                f"SpeechKit TTS error: {response.status_code} - {response.text[:200]}"
             )
-            return None
-    except Exception as e:
-        logger.error(f"Exception in SpeechKit TTS: {str(e)}", exc_info=True)
-        return None
+            return
+
+        async for chunk in response.aiter_bytes():
+            yield chunk
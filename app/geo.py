@@ -0,0 +1,49 @@
+"""
+Geographic distance helpers.
+"""
+
+import math
+from typing import List, Dict, Any, Tuple
+import numpy as np
+
+
+def position_arrays(
+    places: List[Dict[str, Any]]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Gather place latitudes and longitudes in degrees into arrays."""
+    count = len(places)
+    lats = np.fromiter(
+        (p["position"]["lat"] for p in places), dtype=np.float64, count=count
+    )
+    lngs = np.fromiter(
+        (p["position"]["lng"] for p in places), dtype=np.float64, count=count
+    )
+    return lats, lngs
+
+
+def cheap_ruler_distances(
+    latitude: float, longitude: float, places: List[Dict[str, Any]]
+) -> np.ndarray:
+    """Approximate distances in meters from a point to each place.
+
+    Uses a flat-earth projection scaled at the given latitude (Mapbox's
+    cheap-ruler coefficients), which is accurate to well under 1% within
+    the few kilometers we search and much cheaper than haversine.
+    """
+    if not places:
+        return np.empty(0)
+
+    lats, lngs = position_arrays(places)
+
+    cos1 = math.cos(math.radians(latitude))
+    cos2 = 2 * cos1 * cos1 - 1
+    cos3 = 2 * cos1 * cos2 - cos1
+    cos4 = 2 * cos1 * cos3 - cos2
+    cos5 = 2 * cos1 * cos4 - cos3
+    kx = 1000 * (111.41513 * cos1 - 0.09455 * cos3 + 0.00012 * cos5)
+    ky = 1000 * (111.13209 - 0.56605 * cos2 + 0.0012 * cos4)
+
+    # Wrap longitude differences across the antimeridian
+    dx = ((lngs - longitude + 180) % 360 - 180) * kx
+    dy = (lats - latitude) * ky
+    return np.hypot(dx, dy)
@@ -2,10 +2,15 @@
 Google Maps API integration module.
 """
 
+import asyncio
 import os
+import re
 from typing import List, Dict, Any, Tuple
 import httpx
+import orjson
 from app import logger
+from app.cache import TTLCache
+from app.generators import get_http_client
 from app.languages import get_api_message
 
 # API endpoints
@@ -15,6 +20,22 @@ TEXT_SEARCH_URL = "https://places.googleapis.com/v1/places:searchText"
 GEOCODING_URL = "https://maps.googleapis.com/maps/api/geocode/json"
 DIRECTIONS_API_URL = "https://maps.googleapis.com/maps/api/directions/json"
 
+# Response caches keyed by quantized coordinates. Place coordinates are
+# rounded to ~1 m; user locations to ~110 m so nearby users share results.
+GEO_CACHE_TTL = 24 * 60 * 60
+GEO_CACHE_SIZE = 10_000
+_address_cache = TTLCache(maxsize=GEO_CACHE_SIZE, ttl=GEO_CACHE_TTL)
+_nearby_cache = TTLCache(maxsize=GEO_CACHE_SIZE, ttl=GEO_CACHE_TTL)
+
+# Titles we treat as placeholders rather than real place names
+_UNKNOWN_TITLE_RE = re.compile("unknown", re.IGNORECASE)
+
+# Cap on concurrent requests to Google Maps so bursts queue instead of
+# tripping per-project rate limits
+GOOGLE_MAPS_MAX_CONCURRENCY = 20
+_google_maps_semaphore = asyncio.Semaphore(GOOGLE_MAPS_MAX_CONCURRENCY)
+
+
 # Supported place types
 SUPPORTED_PLACE_TYPES = [
     "tourist_attraction",
@@ -30,6 +51,7 @@ SUPPORTED_PLACE_TYPES = [
     "campground",
     "zoo",
 ]
+_SUPPORTED_PLACE_TYPE_SET = frozenset(SUPPORTED_PLACE_TYPES)
 
 
 async def search_places_by_text(
@@ -41,11 +63,8 @@ async def search_places_by_text(
         return []
 
     places = []
-    should_close_client = False
-
     if not http_client:
-        http_client = httpx.AsyncClient(timeout=30.0)
-        should_close_client = True
+        http_client = await get_http_client()
 
     try:
         headers = {
@@ -60,19 +79,20 @@ async def search_places_by_text(
             f"Places API request: URL={TEXT_SEARCH_URL}, Headers={headers}, Body={request_body}"
         )
 
-        response = await http_client.post(
-            TEXT_SEARCH_URL, json=request_body, headers=headers
-        )
+        async with _google_maps_semaphore:
+            response = await http_client.post(
+                TEXT_SEARCH_URL, content=orjson.dumps(request_body), headers=headers
+            )
 
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
 
             if data.get("places"):
                 for place in data.get("places", []):
                     place_type = "tourist_attraction"
                     if place.get("types") and len(place.get("types")) > 0:
                         for t in place.get("types"):
-                            if t in SUPPORTED_PLACE_TYPES:
+                            if t in _SUPPORTED_PLACE_TYPE_SET:
                                 place_type = t
                                 break
 
@@ -110,39 +130,83 @@ async def search_places_by_text(
             )
     except Exception as e:
         logger.error(f"Error in Places API text search: {str(e)}", exc_info=True)
-    finally:
-        if should_close_client:
-            await http_client.aclose()
 
     return places
 
 
+def _normalize_place_types(place_types: List[str] = None) -> List[str]:
+    if not place_types:
+        return SUPPORTED_PLACE_TYPES
+
+    # Categories overlap (e.g. tourist_attraction), so drop repeated types
+    # to avoid issuing the same request twice
+    place_types = list(
+        dict.fromkeys(t for t in place_types if t in _SUPPORTED_PLACE_TYPE_SET)
+    )
+    if not place_types:
+        logger.warning("No supported place types found in the requested types")
+        place_types = ["tourist_attraction", "museum"]
+    return place_types
+
+
+def _nearby_cache_key(latitude, longitude, radius, place_types, rank_by_distance):
+    return (
+        round(latitude, 3),
+        round(longitude, 3),
+        radius,
+        tuple(place_types),
+        rank_by_distance,
+    )
+
+
+def count_cached_nearby_places(
+    latitude: float,
+    longitude: float,
+    radius: int = 1000,
+    place_types: List[str] = None,
+    rank_by_distance: bool = False,
+) -> int | None:
+    """Return how many places a cached nearby search holds, or None if uncached."""
+    cached = _nearby_cache.get(
+        _nearby_cache_key(
+            latitude,
+            longitude,
+            radius,
+            _normalize_place_types(place_types),
+            rank_by_distance,
+        )
+    )
+    return None if cached is None else len(cached)
+
+
 async def get_nearby_places(
     latitude: float,
     longitude: float,
     radius: int = 1000,
     place_types: List[str] = None,
     http_client: httpx.AsyncClient = None,
+    rank_by_distance: bool = False,
 ) -> List[Dict[str, Any]]:
     api_key = os.getenv("GOOGLE_MAPS_API_KEY")
     if not api_key:
         logger.error(get_api_message("google_maps_api_key_error"))
         return []
 
-    if not place_types:
-        place_types = SUPPORTED_PLACE_TYPES
-    else:
-        place_types = [t for t in place_types if t in SUPPORTED_PLACE_TYPES]
-        if not place_types:
-            logger.warning("No supported place types found in the requested types")
-            place_types = ["tourist_attraction", "museum"]
+    place_types = _normalize_place_types(place_types)
+    cache_key = _nearby_cache_key(
+        latitude, longitude, radius, place_types, rank_by_distance
+    )
+    cached = _nearby_cache.get(cache_key)
+    if cached is not None:
+        # Handlers annotate places in place, so hand out copies
+        return [dict(place) for place in cached]
 
     places = []
-    should_close_client = False
-
+    seen_ids = set()
+    # Only a search where every type request succeeded is worth caching
+    complete = True
     if not http_client:
-        http_client = httpx.AsyncClient(timeout=30.0)
-        should_close_client = True
+        http_client = await get_http_client()
 
     try:
         headers = {
@@ -162,25 +226,31 @@ async def get_nearby_places(
                 "includedTypes": [place_type],
                 "languageCode": "en",
             }
+            if rank_by_distance:
+                request_body["rankPreference"] = "DISTANCE"
 
             logger.debug(
                 f"Places API request: URL={PLACES_NEARBY_URL}, Headers={headers}, Body={request_body}"
             )
 
-            response = await http_client.post(
-                PLACES_NEARBY_URL, json=request_body, headers=headers
-            )
+            async with _google_maps_semaphore:
+                response = await http_client.post(
+                    PLACES_NEARBY_URL, content=orjson.dumps(request_body), headers=headers
+                )
 
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
 
                 if data.get("places"):
                     for place in data.get("places", []):
+                        # Nameless and placeholder-named places are never shown
+                        title = place.get("displayName", {}).get("text")
+                        if not title or _UNKNOWN_TITLE_RE.search(title):
+                            continue
+
                         formatted_place = {
                             "id": place.get("id"),
-                            "title": place.get("displayName", {}).get(
-                                "text", get_api_message("unknown_place")
-                            ),
+                            "title": title,
                             "type": place_type,
                             "position": {
                                 "lat": place.get("location", {}).get("latitude", 0),
@@ -202,19 +272,22 @@ async def get_nearby_places(
                             ],
                         }
 
-                        if not any(p["id"] == formatted_place["id"] for p in places):
+                        if formatted_place["id"] not in seen_ids:
+                            seen_ids.add(formatted_place["id"])
                             places.append(formatted_place)
                 else:
-                    logger.debug(f"No places found for type {place_type}")
+                    logger.debug("No places found for type %s", place_type)
             else:
+                complete = False
                 logger.error(
                     f"Places API error for {place_type}: {response.status_code} - {response.text[:200]}"
                 )
     except Exception as e:
+        complete = False
         logger.error(f"Error in Places API nearby search: {str(e)}", exc_info=True)
-    finally:
-        if should_close_client:
-            await http_client.aclose()
+
+    if places and complete:
+        _nearby_cache[cache_key] = [dict(place) for place in places]
 
     return places
 
@@ -228,11 +301,8 @@ async def get_place_details(
         return {}
 
     details = {}
-    should_close_client = False
-
     if not http_client:
-        http_client = httpx.AsyncClient(timeout=30.0)
-        should_close_client = True
+        http_client = await get_http_client()
 
     try:
         headers = {
@@ -241,12 +311,13 @@ async def get_place_details(
         }
 
         url = f"{PLACE_DETAILS_URL}/{place_id}"
-        logger.debug(f"Places API request: URL={url}, Headers={headers}")
+        logger.debug("Places API request: URL=%s, Headers=%s", url, headers)
 
-        response = await http_client.get(url, headers=headers)
+        async with _google_maps_semaphore:
+            response = await http_client.get(url, headers=headers)
 
         if response.status_code == 200:
-            place_data = response.json()
+            place_data = orjson.loads(response.content)
 
             details = {
                 "name": place_data.get("displayName", {}).get(
@@ -280,9 +351,6 @@ async def get_place_details(
             )
     except Exception as e:
         logger.error(f"Error in Places API details: {str(e)}", exc_info=True)
-    finally:
-        if should_close_client:
-            await http_client.aclose()
 
     return details
 
@@ -295,10 +363,13 @@ async def get_detailed_address(
         logger.error(get_api_message("google_maps_api_key_error"))
         return get_api_message("address_not_available"), {}
 
-    should_close_client = False
+    cache_key = (round(latitude, 5), round(longitude, 5))
+    cached = _address_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     if not http_client:
-        http_client = httpx.AsyncClient(timeout=30.0)
-        should_close_client = True
+        http_client = await get_http_client()
 
     try:
         params = {
@@ -307,10 +378,11 @@ async def get_detailed_address(
             "language": "en",
         }
 
-        response = await http_client.get(GEOCODING_URL, params=params)
+        async with _google_maps_semaphore:
+            response = await http_client.get(GEOCODING_URL, params=params)
 
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             if data["status"] == "OK" and data["results"]:
                 result = data["results"][0]
                 formatted_address = result["formatted_address"]
@@ -334,7 +406,9 @@ async def get_detailed_address(
                     "country": address_components.get("country", ""),
                 }
 
-                return formatted_address, {"address": structured_address}
+                address_result = formatted_address, {"address": structured_address}
+                _address_cache[cache_key] = address_result
+                return address_result
 
             logger.warning(f"Geocoding API returned no results: {data}")
             return get_api_message("address_not_available"), {}
@@ -348,9 +422,6 @@ async def get_detailed_address(
         logger.error(f"Error in Geocoding API: {str(e)}", exc_info=True)
         return get_api_message("address_not_available"), {}
 
-    finally:
-        if should_close_client:
-            await http_client.aclose()
 
 
 async def get_walking_directions_polyline(
@@ -365,10 +436,8 @@ async def get_walking_directions_polyline(
         logger.error(get_api_message("google_maps_api_key_error"))
         return None
 
-    should_close_client = False
     if not http_client:
-        http_client = httpx.AsyncClient(timeout=30.0)
-        should_close_client = True
+        http_client = await get_http_client()
 
     try:
         params = {
@@ -378,10 +447,11 @@ async def get_walking_directions_polyline(
             "key": api_key,
         }
 
-        response = await http_client.get(DIRECTIONS_API_URL, params=params)
+        async with _google_maps_semaphore:
+            response = await http_client.get(DIRECTIONS_API_URL, params=params)
 
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             if data["status"] == "OK" and data["routes"]:
                 return data["routes"][0]["overview_polyline"]["points"]
 
@@ -397,50 +467,6 @@ async def get_walking_directions_polyline(
         logger.error(f"Error in Directions API: {str(e)}", exc_info=True)
         return None
 
-    finally:
-        if should_close_client:
-            await http_client.aclose()
-
-
-async def get_place_photo(
-    photo_reference: str, max_width: int = 600, http_client: httpx.AsyncClient = None
-) -> bytes:
-    api_key = os.getenv("GOOGLE_MAPS_API_KEY")
-    if not api_key:
-        logger.error(get_api_message("google_maps_api_key_error"))
-        return None
-
-    should_close_client = False
-    if not http_client:
-        http_client = httpx.AsyncClient(timeout=30.0)
-        should_close_client = True
-
-    try:
-        params = {
-            "photo_reference": photo_reference,
-            "maxwidth": str(max_width),
-            "key": api_key,
-        }
-
-        response = await http_client.get(
-            "https://maps.googleapis.com/maps/api/place/photo", params=params
-        )
-
-        if response.status_code == 200:
-            return response.content
-
-        logger.error(
-            f"Place Photos API error: {response.status_code} - {response.text[:200]}"
-        )
-        return None
-
-    except Exception as e:
-        logger.error(f"Error in Place Photos API: {str(e)}", exc_info=True)
-        return None
-
-    finally:
-        if should_close_client:
-            await http_client.aclose()
 
 
 async def test_connection():
@@ -451,14 +477,14 @@ async def test_connection():
         return False
 
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            # Test geocoding API
-            params = {
-                "latlng": "40.714224,-73.961452",  # Example coordinates
-                "key": api_key,
-            }
-            response = await client.get(GEOCODING_URL, params=params)
-            return response.status_code == 200
+        client = await get_http_client()
+        # Test geocoding API
+        params = {
+            "latlng": "40.714224,-73.961452",  # Example coordinates
+            "key": api_key,
+        }
+        response = await client.get(GEOCODING_URL, params=params, timeout=10.0)
+        return response.status_code == 200
 
     except Exception as e:
         logger.error(f"Error testing Google Maps API connection: {str(e)}")
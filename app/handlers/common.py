@@ -2,73 +2,136 @@
 Common utilities and helper functions for handlers.
 """
 
+import asyncio
+import functools
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from app.languages import get_message, EMOJI_MAP
-from .state import user_preferences
+from app.languages import (
+    get_message,
+    EMOJI_MAP,
+    AVAILABLE_LANGUAGES,
+    DEFAULT_LANGUAGE,
+)
+from .state import (
+    user_preferences,
+    DEFAULT_PREFERENCES,
+    PREFERENCE_BITS,
+    POI_CATEGORY_MAPPING,
+    PreferenceCallback,
+    LanguageCallback,
+)
 
 
-def create_place_types_keyboard(user_id: int, lang: str) -> InlineKeyboardMarkup:
-    """Create keyboard for place type selection."""
-    prefs = user_preferences.get(
-        user_id,
-        {
-            "nature": True,
-            "religion": True,
-            "culture": True,
-            "history": True,
-            "must_visit": True,
-        },
+def preferences_to_mask(preferences: dict) -> int:
+    """Pack a category -> enabled dict into a preferences mask."""
+    return sum(
+        bit for category, bit in PREFERENCE_BITS.items() if preferences.get(category)
     )
 
+
+def enabled_categories(mask: int) -> list:
+    """Return the categories enabled in a preferences mask, in display order."""
+    return [category for category, bit in PREFERENCE_BITS.items() if mask & bit]
+
+
+async def load_user_preferences(user_id: int, db=None):
+    """Return a user's POI preferences mask, loading saved ones from the database."""
+    mask = user_preferences.get(user_id)
+    if mask is None and db:
+        saved = await asyncio.to_thread(db.get_user_preferences, user_id)
+        if saved is not None:
+            mask = user_preferences[user_id] = preferences_to_mask(saved)
+    return mask
+
+
+async def ensure_user_preferences(user_id: int, db=None) -> int:
+    """Return a user's POI preferences mask, initializing it to the defaults."""
+    mask = await load_user_preferences(user_id, db)
+    if mask is None:
+        mask = user_preferences[user_id] = DEFAULT_PREFERENCES
+    return mask
+
+
+@functools.lru_cache(maxsize=1 << len(PREFERENCE_BITS))
+def _place_types_for_mask(mask: int) -> tuple:
+    return tuple(
+        dict.fromkeys(
+            place_type
+            for category in enabled_categories(mask)
+            for place_type in POI_CATEGORY_MAPPING[category]
+        )
+    )
+
+
+def place_types_for_preferences(mask) -> list:
+    """Return the Google place types for a user's enabled POI categories."""
+    if not mask:
+        return []
+    return list(_place_types_for_mask(mask))
+
+
+# Packed toggle callbacks, one per category, in display order
+_PREFERENCE_CALLBACKS = {
+    category: PreferenceCallback(action="toggle", category=category).pack()
+    for category in PREFERENCE_BITS
+}
+_SAVE_PREFERENCES_CALLBACK = PreferenceCallback(action="save").pack()
+
+# Button labels for every (category, language, enabled) combination
+_PREFERENCE_LABELS = {
+    (category, lang, enabled): f"{EMOJI_MAP[category]} {get_message(category, lang)} {'✅' if enabled else '◻️'}"
+    for category in PREFERENCE_BITS
+    for lang in AVAILABLE_LANGUAGES
+    for enabled in (True, False)
+}
+
+
+def create_place_types_keyboard(
+    user_id: int, lang: str, mask: int | None = None
+) -> InlineKeyboardMarkup:
+    """Create keyboard for place type selection."""
+    if mask is None:
+        mask = user_preferences.get(user_id, DEFAULT_PREFERENCES)
+    return _place_types_keyboard(mask, lang)
+
+
+# One keyboard per preferences mask and language, shared between users
+@functools.lru_cache(maxsize=256)
+def _place_types_keyboard(mask: int, lang: str) -> InlineKeyboardMarkup:
+    if lang not in AVAILABLE_LANGUAGES:
+        lang = DEFAULT_LANGUAGE
     return InlineKeyboardMarkup(
         inline_keyboard=[
-            [
-                InlineKeyboardButton(
-                    text=f"{EMOJI_MAP['nature']} {get_message('nature', lang)} {'✅' if prefs['nature'] else '◻️'}",
-                    callback_data="toggle_nature",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text=f"{EMOJI_MAP['religion']} {get_message('religion', lang)} {'✅' if prefs['religion'] else '◻️'}",
-                    callback_data="toggle_religion",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text=f"{EMOJI_MAP['culture']} {get_message('culture', lang)} {'✅' if prefs['culture'] else '◻️'}",
-                    callback_data="toggle_culture",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text=f"{EMOJI_MAP['history']} {get_message('history', lang)} {'✅' if prefs['history'] else '◻️'}",
-                    callback_data="toggle_history",
-                )
-            ],
-            [
-                InlineKeyboardButton(
-                    text=f"{EMOJI_MAP['must_visit']} {get_message('must_visit', lang)} {'✅' if prefs['must_visit'] else '◻️'}",
-                    callback_data="toggle_must_visit",
-                )
-            ],
+            *(
+                [
+                    InlineKeyboardButton(
+                        text=_PREFERENCE_LABELS[
+                            category, lang, bool(mask & PREFERENCE_BITS[category])
+                        ],
+                        callback_data=callback_data,
+                    )
+                ]
+                for category, callback_data in _PREFERENCE_CALLBACKS.items()
+            ),
             [
                 InlineKeyboardButton(
                     text=f"{EMOJI_MAP['save']} {get_message('save_and_close', lang)}",
-                    callback_data="save_settings",
+                    callback_data=_SAVE_PREFERENCES_CALLBACK,
                 )
             ],
         ]
     )
 
 
+@functools.lru_cache(maxsize=1)
 def create_language_keyboard() -> InlineKeyboardMarkup:
     """Create keyboard for language selection."""
-    from app.languages import AVAILABLE_LANGUAGES
-
     return InlineKeyboardMarkup(
         inline_keyboard=[
-            [InlineKeyboardButton(text=name, callback_data=f"lang_{code}")]
+            [
+                InlineKeyboardButton(
+                    text=name, callback_data=LanguageCallback(code=code).pack()
+                )
+            ]
             for code, name in AVAILABLE_LANGUAGES.items()
         ]
     )
@@ -3,37 +3,260 @@ Location handling and place discovery handlers.
 """
 
 import asyncio
+import contextlib
+import functools
+import random
+import time
+import numpy as np
 from aiogram import F
+from aiogram.exceptions import (
+    TelegramEntityTooLarge,
+    TelegramForbiddenError,
+    TelegramNetworkError,
+    TelegramRetryAfter,
+    TelegramServerError,
+)
 from aiogram.types import (
+    InputFile,
     Message,
     CallbackQuery,
     BufferedInputFile,
     InlineKeyboardMarkup,
     InlineKeyboardButton,
 )
-from app.languages import get_message, get_user_language
+from app.languages import get_message, format_message, get_user_language
 from app import logger
 from app.generators import (
     deepseek_location_info,
-    yandex_speechkit_tts,
-    translate_to_english,
+    deepseek_location_info_stream,
+    yandex_speechkit_tts_stream,
+    translate_to_english_batch,
     get_http_client,
 )
 from app.google_maps import (
     get_nearby_places,
+    count_cached_nearby_places,
     get_detailed_address,
     get_walking_directions_polyline,
 )
 from app.maps_static import get_static_map_image
-from geopy.distance import geodesic
+from app.geo import cheap_ruler_distances
+from .common import load_user_preferences, place_types_for_preferences
 from .state import (
     router,
     user_data,
     active_deepseek_requests,
-    user_preferences,
-    POI_CATEGORY_MAPPING,
+    deepseek_cooldowns,
+    DEEPSEEK_COOLDOWN,
+    PlaceCallback,
 )
 
+# Cap on concurrent outbound API calls across all users to smooth bursts
+MAX_CONCURRENT_RPCS = 64
+_rpc_semaphore = asyncio.Semaphore(MAX_CONCURRENT_RPCS)
+
+# Place histories being generated, keyed like the shared history cache
+_history_inflight = {}
+
+# Strong references to fire-and-forget tasks so they are not collected early
+_background_tasks = set()
+
+# Number emojis for places
+NUMBER_EMOJIS = ("1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣")
+
+# Place card layout
+PLACE_CARD_TEMPLATE = (
+    "{emoji} <b>{primary_name}</b>{secondary_line}\n\n"
+    "📍 {address}\n"
+    "🚶 {distance_km:.1f} km\n"
+    "🏷️ {place_type}\n"
+    "{website_line}"
+)
+SECONDARY_NAME_TEMPLATE = "\n<i>{name}</i>"
+WEBSITE_TEMPLATE = "\n🌐 <b>Website:</b> {url}"
+
+# Telegram rejects bot uploads above 50 MB
+MAX_VOICE_BYTES = 50 * 1024 * 1024
+
+# Voice message retries
+VOICE_SEND_ATTEMPTS = 3
+VOICE_RETRY_MAX_DELAY = 4.0
+
+# Seconds the 10 km fallback search may run, counted from its start
+WIDEST_SEARCH_TIMEOUT = 4.0
+
+# Minimum seconds between interim status message edits
+STATUS_EDIT_INTERVAL = 0.8
+
+# Streaming history edits: minimum seconds and new characters between edits
+STREAM_EDIT_INTERVAL = 0.8
+STREAM_EDIT_MIN_CHARS = 24
+
+
+def _spawn_background(coro):
+    """Run a coroutine in the background, keeping it referenced until done.
+
+    Failures are logged, so a task nobody awaits does not fail silently.
+    """
+    task = asyncio.create_task(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_finish_background)
+    return task
+
+
+def _finish_background(task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and (error := task.exception()):
+        logger.error(f"Background task failed: {error}", exc_info=error)
+
+
+async def _guarded(coro):
+    """Await an outbound API call while holding the shared RPC semaphore."""
+    async with _rpc_semaphore:
+        return await coro
+
+
+def _unseen_places(candidates, seen_ids):
+    """Yield candidates not seen in an earlier search, recording their ids."""
+    for place in candidates:
+        place_id = place["id"]
+        if place_id not in seen_ids:
+            seen_ids.add(place_id)
+            yield place
+
+
+async def _pretranslate_places(places, http_client, extra_texts=()):
+    """Fetch addresses for all places and translate them in a single batch.
+
+    Any extra_texts ride along in the same request; their translations are
+    returned in order, or the originals if translation fails.
+    """
+    extra_texts = list(extra_texts)
+    pending = [place for place in places if not place.get("_translated")]
+    if not pending and not extra_texts:
+        return extra_texts
+
+    try:
+        address_results = await asyncio.gather(
+            *(
+                _guarded(
+                    get_detailed_address(
+                        place["position"]["lat"],
+                        place["position"]["lng"],
+                        http_client,
+                    )
+                )
+                for place in pending
+            )
+        )
+        detailed_addresses = [address for address, _ in address_results]
+
+        for place in pending:
+            place.setdefault("original_title", place["title"])
+
+        translations = await _guarded(
+            translate_to_english_batch(
+                [place["original_title"] for place in pending]
+                + detailed_addresses
+                + extra_texts,
+                http_client,
+            )
+        )
+        english_names = translations[: len(pending)]
+        english_addresses = translations[len(pending) : 2 * len(pending)]
+        english_extras = translations[2 * len(pending) :]
+
+        for place, detailed_address, english_name, english_address in zip(
+            pending, detailed_addresses, english_names, english_addresses
+        ):
+            place["original_address"] = detailed_address
+            place["title"] = english_name
+            place["address"] = {"label": english_address}
+            place["_translated"] = True
+
+        return english_extras
+    except Exception as e:
+        logger.error(f"Error pre-translating places: {e}", exc_info=True)
+        return extra_texts
+
+
+async def _ensure_place_translated(place, http_client):
+    """Fetch and translate a single place's address and title if still needed.
+
+    Unlike the background batch, errors propagate to the calling handler.
+    """
+    if place.get("_translated"):
+        return
+
+    detailed_address, _ = await _guarded(
+        get_detailed_address(
+            place["position"]["lat"], place["position"]["lng"], http_client
+        )
+    )
+
+    place.setdefault("original_title", place["title"])
+    place["original_address"] = detailed_address
+
+    english_name, english_address = await _guarded(
+        translate_to_english_batch(
+            [place["original_title"], detailed_address], http_client
+        )
+    )
+    place["title"] = english_name
+    place["address"] = {"label": english_address}
+    place["_translated"] = True
+
+
+async def _pretranslate_session(session, http_client):
+    """Translate the session's street, city and first place in one request."""
+    session["street"], session["city"] = await _pretranslate_places(
+        session["places"][:1], http_client, (session["street"], session["city"])
+    )
+
+
+async def _await_background_translation(data, place_index):
+    """Wait for any pretranslation or prefetch that covers the given place."""
+    if data.get("pretranslate"):
+        await data["pretranslate"]
+
+    prefetch_task = data.get("prefetch", {}).get(place_index)
+    if prefetch_task:
+        await prefetch_task
+
+
+def _prefetch_other_places(data, place_index, http_client):
+    """Translate the other places in one background batch while this one is read."""
+    places = data["places"]
+    prefetch = data.setdefault("prefetch", {})
+    pending = [
+        index
+        for index, place in enumerate(places)
+        if index != place_index
+        and index not in prefetch
+        and not place.get("_translated")
+    ]
+    if not pending:
+        return
+
+    task = _spawn_background(
+        _pretranslate_places([places[index] for index in pending], http_client)
+    )
+    for index in pending:
+        prefetch[index] = task
+
+
+async def _edit_status(status_message, text, last_edit, force=False):
+    """Edit an interim status message, skipping edits that come too quickly.
+
+    Returns the time of the last edit that was actually sent.
+    """
+    now = time.monotonic()
+    if not force and now - last_edit < STATUS_EDIT_INTERVAL:
+        return last_edit
+
+    await status_message.edit_text(text)
+    return now
+
 
 @router.message(F.location)
 async def handle_location(message: Message, db=None):
@@ -45,165 +268,191 @@ async def handle_location(message: Message, db=None):
         longitude = message.location.longitude
 
         # Check if user has any place types selected
-        if user_id in user_preferences:
-            prefs = user_preferences[user_id]
-            if not any(prefs.values()):
-                await message.answer(get_message("no_places_selected", lang))
-                return
+        prefs = await load_user_preferences(user_id, db)
+        if prefs == 0:
+            await message.answer(get_message("no_places_selected", lang))
+            return
 
         # Initialize http client
         http_client = await get_http_client()
 
         # Get user preferences
-        selected_poi_types = []
-        if user_id in user_preferences:
-            prefs = user_preferences[user_id]
-            for category, is_selected in prefs.items():
-                if is_selected:
-                    selected_poi_types.extend(POI_CATEGORY_MAPPING[category])
-
+        selected_poi_types = place_types_for_preferences(prefs)
         if not selected_poi_types:
             selected_poi_types = ["tourist_attraction", "museum"]
 
         # Show initial status message
         status_message = await message.answer(get_message("scouting", lang))
-
-        tasks = [
-            get_detailed_address(latitude, longitude, http_client),
-            get_nearby_places(
-                latitude,
-                longitude,
-                radius=1000,
-                place_types=selected_poi_types,
-                http_client=http_client,
-            ),
-        ]
-
-        results = await asyncio.gather(*tasks)
-        address_result, places = results[0], results[1]
-
-        address, address_data = address_result
-        address_parts = address_data.get("address", {})
-        street = address.split(",")[0] if "," in address else "Unknown Street"
-        city = address_parts.get("city", "Unknown City")
-
-        translation_tasks = [translate_to_english(street), translate_to_english(city)]
-
-        wider_search_task = None
-        if len(places) < 5:
-            await status_message.edit_text(get_message("searching_wider", lang))
-            wider_search_task = asyncio.create_task(
-                get_nearby_places(
-                    latitude,
-                    longitude,
-                    radius=5000,
-                    place_types=selected_poi_types,
-                    http_client=http_client,
-                )
+        status_edit_ts = time.monotonic()
+
+        # One distance-ranked 5 km search covers both the nearby and the wider
+        # radius. The 10 km fallback runs alongside it so a sparse area waits
+        # for the slower of the two searches, not their sum.
+        # In an area whose 5 km results are cached and already sufficient,
+        # the fallback is skipped entirely.
+        cached_count = count_cached_nearby_places(
+            latitude,
+            longitude,
+            radius=5000,
+            place_types=selected_poi_types,
+            rank_by_distance=True,
+        )
+        widest_task = None
+        if cached_count is None or cached_count < 2:
+            widest_deadline = (
+                asyncio.get_running_loop().time() + WIDEST_SEARCH_TIMEOUT
             )
-
-        english_street, english_city = await asyncio.gather(*translation_tasks)
-
-        valid_places = []
-        for place in places:
-            if "unknown" in place["title"].lower():
-                continue
-
-            place["distance"] = geodesic(
-                (latitude, longitude),
-                (place["position"]["lat"], place["position"]["lng"]),
-            ).meters
-            valid_places.append(place)
-
-        if wider_search_task:
-            done, pending = await asyncio.wait([wider_search_task], timeout=3)
-
-            if done:
-                wider_places = wider_search_task.result()
-                for place in wider_places:
-                    if "unknown" in place["title"].lower():
-                        continue
-                    if not any(p["id"] == place["id"] for p in valid_places):
-                        place["distance"] = geodesic(
-                            (latitude, longitude),
-                            (place["position"]["lat"], place["position"]["lng"]),
-                        ).meters
-                        valid_places.append(place)
-            else:
-                wider_search_task.cancel()
-                try:
-                    await wider_search_task
-                except asyncio.CancelledError:
-                    pass
-
-        if len(valid_places) < 2:
-            await status_message.edit_text(get_message("searching_farthest", lang))
-            try:
-                widest_places = await asyncio.wait_for(
+            widest_task = asyncio.create_task(
+                _guarded(
                     get_nearby_places(
                         latitude,
                         longitude,
                         radius=10000,
                         place_types=selected_poi_types,
                         http_client=http_client,
-                    ),
-                    timeout=4,
+                    )
                 )
+            )
 
-                for place in widest_places:
-                    if "unknown" in place["title"].lower():
-                        continue
-                    if not any(p["id"] == place["id"] for p in valid_places):
-                        place["distance"] = geodesic(
-                            (latitude, longitude),
-                            (place["position"]["lat"], place["position"]["lng"]),
-                        ).meters
-                        valid_places.append(place)
-            except asyncio.TimeoutError:
-                pass
+        try:
+            async with asyncio.TaskGroup() as tg:
+                address_task = tg.create_task(
+                    _guarded(get_detailed_address(latitude, longitude, http_client))
+                )
+                places_task = tg.create_task(
+                    _guarded(
+                        get_nearby_places(
+                            latitude,
+                            longitude,
+                            radius=5000,
+                            place_types=selected_poi_types,
+                            http_client=http_client,
+                            rank_by_distance=True,
+                        )
+                    )
+                )
+
+            address, address_data = address_task.result()
+            places = places_task.result()
+            address_parts = address_data.get("address", {})
+            street, comma, _ = address.partition(",")
+            if not comma:
+                street = "Unknown Street"
+            city = address_parts.get("city", "Unknown City")
+
+            seen_ids = set()
+            valid_places = list(_unseen_places(places, seen_ids))
+
+            if len(valid_places) < 2 and widest_task:
+                if not widest_task.done():
+                    status_edit_ts = await _edit_status(
+                        status_message,
+                        get_message("searching_farthest", lang),
+                        status_edit_ts,
+                    )
+                try:
+                    async with asyncio.timeout_at(widest_deadline):
+                        widest_places = await widest_task
+                except TimeoutError:
+                    widest_places = []
+
+                valid_places.extend(_unseen_places(widest_places, seen_ids))
+        finally:
+            # The fallback is not needed once the 5 km search found enough
+            if widest_task and not widest_task.done():
+                widest_task.cancel()
 
         if not valid_places:
             await status_message.edit_text(get_message("no_places", lang))
             return
 
-        valid_places.sort(key=lambda x: x["distance"])
-        closest_places = valid_places[:5] if len(valid_places) >= 5 else valid_places
-
-        # Update status message to indicate we're generating a map
-        await status_message.edit_text(get_message("generating_map", lang))
-
-        # Generate the static map for all places
-        map_image = await get_static_map_image(
-            closest_places, latitude, longitude, http_client
-        )
-
-        # Store the user data
-        user_data[user_id] = {
+        # Compute all distances in one vectorized pass once candidates are final.
+        # Within 10 km a flat-earth approximation ranks places just as well.
+        # Only the five closest dicts are materialized and annotated.
+        distances = cheap_ruler_distances(latitude, longitude, valid_places)
+        # Partition out the nearest few before sorting just those, the array
+        # equivalent of heapq.nsmallest.
+        count = min(5, len(distances))
+        order = np.argpartition(distances, count - 1)[:count]
+        order = order[np.argsort(distances[order], kind="stable")]
+        closest_places = [valid_places[i] for i in order.tolist()]
+        for place, distance in zip(closest_places, distances[order].tolist()):
+            place["distance"] = distance
+
+        session = {
             "places": closest_places,
             "current_index": 0,
             "latitude": latitude,
             "longitude": longitude,
-            "street": english_street,
-            "city": english_city,
+            "street": street,
+            "city": city,
             "db": db,
+            "http_client": http_client,
             "last_message": None,
-            "map_image": map_image,
+            "map_file_id": None,
+            "keyboards": [
+                _build_place_keyboard(i, closest_places, lang)
+                for i in range(len(closest_places))
+            ],
         }
 
+        # Translate the location and the first place in the background while
+        # the map renders; the other places follow once its card is shown
+        session["pretranslate"] = _spawn_background(
+            _pretranslate_session(session, http_client)
+        )
+
+        # Walking routes are needed for every "tell more", so fetch them early
+        session["polylines"] = _spawn_background(
+            _prefetch_polylines(closest_places, latitude, longitude, http_client)
+        )
+
+        # Update status message to indicate we're generating a map
+        status_edit_ts = await _edit_status(
+            status_message, get_message("generating_map", lang), status_edit_ts
+        )
+
+        # Generate the static map for all places
+        map_image = await _guarded(
+            get_static_map_image(closest_places, latitude, longitude, http_client)
+        )
+
+        # Store the user data
+        user_data[user_id] = session
+
+        # Record the shown places in one batched write, off the response path
+        if db:
+            search_rows = [
+                (
+                    user_id,
+                    place["title"],
+                    place.get("type"),
+                    place["position"]["lat"],
+                    place["position"]["lng"],
+                    city,
+                )
+                for place in closest_places
+            ]
+            _spawn_background(asyncio.to_thread(db.log_searches, search_rows))
+
         # First send the message about found places
-        places_count_message = get_message("places_found", lang).format(
-            count=len(closest_places)
+        places_count_message = format_message(
+            "places_found", lang, count=len(closest_places)
         )
         await status_message.edit_text(places_count_message)
 
         # Then send the map image
         if map_image:
             try:
-                photo = BufferedInputFile(map_image, filename="map.png")
-                map_caption = get_message("map_caption", lang).format(
-                    count=len(closest_places)
+                map_caption = format_message(
+                    "map_caption", lang, count=len(closest_places)
                 )
-                await message.answer_photo(photo=photo, caption=map_caption)
+                sent_map = await message.answer_photo(
+                    photo=BufferedInputFile(map_image, filename="map.png"),
+                    caption=map_caption,
+                )
+                # Keep Telegram's file_id for re-sends instead of the PNG bytes
+                user_data[user_id]["map_file_id"] = sent_map.photo[-1].file_id
             except Exception as map_error:
                 logger.error(f"Error sending map image: {map_error}")
 
@@ -215,6 +464,136 @@ async def handle_location(message: Message, db=None):
         await message.answer(get_message("try_again", lang))
 
 
+def _place_emoji(place_index):
+    """Return the number emoji for a place, or its plain number past the fifth."""
+    try:
+        return NUMBER_EMOJIS[place_index]
+    except IndexError:
+        return str(place_index + 1)
+
+
+def _render_place_card(place, place_index, lang):
+    """Render the text of a place card, memoized on the place per language."""
+    cards = place.setdefault("_cards", {})
+    if lang in cards:
+        return cards[lang]
+
+    # Determine which name to show first based on language
+    if lang == "ru":
+        primary_name = place.get("original_title", place["title"])
+        secondary_name = place["title"]
+    else:
+        primary_name = place["title"]
+        secondary_name = place.get("original_title", place["title"])
+
+    place_address = place["address"]["label"]
+    distance_km = place["distance"] / 1000
+    place_type = place.get("type", "point of interest")
+
+    secondary_line = (
+        SECONDARY_NAME_TEMPLATE.format(name=secondary_name)
+        if secondary_name and secondary_name != primary_name
+        else ""
+    )
+
+    website_line = ""
+    place_url = place.get("contacts", [])
+    if place_url:
+        place_url = place_url[0].get("www", "url_not_found")
+        if isinstance(place_url, list) and place_url:
+            place_url = place_url[0].get("value", "url_not_found")
+
+        if place_url != "url_not_found":
+            website_line = WEBSITE_TEMPLATE.format(url=place_url)
+
+    # Number emoji, primary name in bold and secondary name in italic
+    cards[lang] = PLACE_CARD_TEMPLATE.format(
+        emoji=_place_emoji(place_index),
+        primary_name=primary_name,
+        secondary_line=secondary_line,
+        address=place_address,
+        distance_km=distance_km,
+        place_type=place_type,
+        website_line=website_line,
+    )
+    return cards[lang]
+
+
+@functools.lru_cache(maxsize=1024)
+def _maps_button(lat, lng, lang):
+    """Build the Google Maps button for coordinates rounded to ~1 m."""
+    return InlineKeyboardButton(
+        text=get_message("show_maps_btn", lang),
+        url=f"https://www.google.com/maps/search/?api=1&query={lat},{lng}",
+    )
+
+
+def _rounded_position(place):
+    position = place["position"]
+    return round(position["lat"], 5), round(position["lng"], 5)
+
+
+@functools.lru_cache(maxsize=128)
+def _tell_more_button(place_index, lang):
+    return InlineKeyboardButton(
+        text=get_message("tell_more_btn", lang),
+        callback_data=PlaceCallback(action="more", index=place_index).pack(),
+    )
+
+
+@functools.lru_cache(maxsize=128)
+def _next_button(place_index, places_count, lang):
+    """Build the navigation button, which only depends on position and language."""
+    next_text = (
+        get_message("next_location", lang)
+        if place_index < places_count - 1
+        else get_message("back_to_first", lang)
+    )
+    return InlineKeyboardButton(
+        text=next_text,
+        callback_data=PlaceCallback(
+            action="next", index=(place_index + 1) % places_count
+        ).pack(),
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _place_keyboard(place_index, places_count, lat, lng, lang):
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                _tell_more_button(place_index, lang),
+                _maps_button(lat, lng, lang),
+            ],
+            [_next_button(place_index, places_count, lang)],
+        ]
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _history_keyboard(place_index, places_count, lat, lng, lang):
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [_maps_button(lat, lng, lang)],
+            [_next_button(place_index, places_count, lang)],
+        ]
+    )
+
+
+def _build_place_keyboard(place_index, places, lang):
+    """Build the navigation keyboard shown under a place card."""
+    return _place_keyboard(
+        place_index, len(places), *_rounded_position(places[place_index]), lang
+    )
+
+
+def _build_history_keyboard(place_index, places, lang):
+    """Build the keyboard left on a place card after its history was requested."""
+    return _history_keyboard(
+        place_index, len(places), *_rounded_position(places[place_index]), lang
+    )
+
+
 async def show_place(message, user_id, place_index):
     """Show details of a specific place."""
     try:
@@ -225,120 +604,40 @@ async def show_place(message, user_id, place_index):
         data = user_data[user_id]
         places = data["places"]
         lang = get_user_language(user_id)
+        http_client = data.get("http_client") or await get_http_client()
 
         if place_index < 0 or place_index >= len(places):
             place_index = 0
 
-        # Number emojis for places
-        number_emojis = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣"]
-        current_emoji = (
-            number_emojis[place_index]
-            if place_index < len(number_emojis)
-            else str(place_index + 1)
-        )
-
         data["current_index"] = place_index
         place = places[place_index]
-        place_lat = place["position"]["lat"]
-        place_lng = place["position"]["lng"]
-
-        needs_processing = (
-            not "original_title" in place
-            or place["address"].get("label") == "Address will be fetched"
-            or "title" in place
-            and place["title"] == place.get("original_title")
-        )
 
-        if needs_processing:
+        processing_message = None
+        if not place.get("_translated"):
             processing_message = await message.answer(
                 get_message("reading_signs", lang)
             )
 
-            detailed_address, _ = await get_detailed_address(place_lat, place_lng)
-
-            if not "original_title" in place:
-                place["original_title"] = place["title"]
-            place["original_address"] = detailed_address
-
-            translation_tasks = [
-                translate_to_english(place["original_title"]),
-                translate_to_english(detailed_address),
-            ]
-
-            english_name, english_address = await asyncio.gather(*translation_tasks)
+            # Prefer the batch translation started by handle_location
+            await _await_background_translation(data, place_index)
 
-            place["title"] = english_name
-            place["address"] = {"label": english_address}
+        await _ensure_place_translated(place, http_client)
 
-            try:
+        if processing_message:
+            with contextlib.suppress(Exception):
                 await processing_message.delete()
-            except Exception:
-                pass
 
-        # Determine which name to show first based on language
-        if lang == "ru":
-            primary_name = place.get("original_title", place["title"])
-            secondary_name = place["title"]
+        keyboards = data.get("keyboards")
+        if keyboards and place_index < len(keyboards):
+            keyboard = keyboards[place_index]
         else:
-            primary_name = place["title"]
-            secondary_name = place.get("original_title", place["title"])
+            keyboard = _build_place_keyboard(place_index, places, lang)
 
-        place_address = place["address"]["label"]
-        distance_km = place["distance"] / 1000
-        place_type = place.get("type", "point of interest")
+        message_text = _render_place_card(place, place_index, lang)
 
-        google_maps_url = (
-            f"https://www.google.com/maps/search/?api=1&query={place_lat},{place_lng}"
-        )
-
-        next_text = (
-            get_message("next_location", lang)
-            if place_index < len(places) - 1
-            else get_message("back_to_first", lang)
-        )
-
-        keyboard = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text=get_message("tell_more_btn", lang),
-                        callback_data=f"more_{place_index}",
-                    ),
-                    InlineKeyboardButton(
-                        text=get_message("show_maps_btn", lang),
-                        url=google_maps_url,
-                    ),
-                ],
-                [
-                    InlineKeyboardButton(
-                        text=next_text,
-                        callback_data=f"next_{(place_index + 1) % len(places)}",
-                    )
-                ],
-            ]
-        )
-
-        # Format the message with number emoji, primary name in bold and secondary name in italic
-        message_text = f"{current_emoji} <b>{primary_name}</b>"
-        if secondary_name and secondary_name != primary_name:
-            message_text += f"\n<i>{secondary_name}</i>"
-
-        message_text += f"\n\n📍 {place_address}\n"
-        message_text += f"🚶 {distance_km:.1f} km\n"
-        message_text += f"🏷️ {place_type}\n"
-
-        place_url = place.get("contacts", [])
-        if place_url:
-            place_url = place_url[0].get("www", "url_not_found")
-            if isinstance(place_url, list) and place_url:
-                place_url = place_url[0].get("value", "url_not_found")
-
-            if place_url != "url_not_found":
-                message_text += f"\n🌐 <b>Website:</b> {place_url}"
-
-        if "last_message" in data and data["last_message"]:
+        if last_message := data.get("last_message"):
             try:
-                await data["last_message"].edit_text(
+                await last_message.edit_text(
                     message_text, parse_mode="HTML", reply_markup=keyboard
                 )
             except Exception as edit_error:
@@ -353,6 +652,8 @@ async def show_place(message, user_id, place_index):
             )
             data["last_message"] = sent_message
 
+        _prefetch_other_places(data, place_index, http_client)
+
     except Exception as e:
         logger.error(f"Error in show_place: {e}", exc_info=True)
         await message.answer(
@@ -360,14 +661,13 @@ async def show_place(message, user_id, place_index):
         )
 
 
-@router.callback_query(F.data.startswith("next_"))
-async def handle_next_location(callback: CallbackQuery):
+@router.callback_query(PlaceCallback.filter(F.action == "next"))
+async def handle_next_location(callback: CallbackQuery, callback_data: PlaceCallback):
     """Handle showing the next location."""
     try:
         await callback.answer()
         user_id = callback.from_user.id
-        _, index = callback.data.split("_")
-        index = int(index)
+        index = callback_data.index
         lang = get_user_language(user_id)
 
         if user_id not in user_data:
@@ -383,17 +683,262 @@ async def handle_next_location(callback: CallbackQuery):
         )
 
 
-@router.callback_query(F.data.startswith("more_"))
-async def handle_tell_more(callback: CallbackQuery):
+async def _prefetch_polylines(places, user_lat, user_lng, http_client):
+    """Fetch walking routes to all places and store them on the place dicts."""
+    polylines = await asyncio.gather(
+        *(
+            _guarded(
+                get_walking_directions_polyline(
+                    user_lat,
+                    user_lng,
+                    place["position"]["lat"],
+                    place["position"]["lng"],
+                    http_client,
+                )
+            )
+            for place in places
+        )
+    )
+    for place, polyline in zip(places, polylines):
+        if polyline:
+            place["polyline"] = polyline
+
+
+async def _fetch_route_map(place, user_lat, user_lng, http_client, prefetch=None):
+    """Fetch a static map with the walking route from the user to a place."""
+    if prefetch:
+        with contextlib.suppress(Exception):
+            await prefetch
+
+    walking_polyline = place.get("polyline") or await _guarded(
+        get_walking_directions_polyline(
+            user_lat,
+            user_lng,
+            place["position"]["lat"],
+            place["position"]["lng"],
+            http_client,
+        )
+    )
+    if not walking_polyline:
+        return None
+
+    return await _guarded(
+        get_static_map_image(
+            places=[place],
+            user_lat=user_lat,
+            user_lng=user_lng,
+            http_client=http_client,
+            path_polyline=walking_polyline,
+        )
+    )
+
+
+def _history_cache_key(place, lang):
+    """Build the key under which a generated place history is shared.
+
+    Google's place id is stable, unlike the geocoded city or translated title.
+    """
+    return f"{place['id']}|{lang}"
+
+
+async def _generate_history(
+    history_msg, data, place, display_name, place_label, http_client, lang
+):
+    """Stream a place history into history_msg, falling back to a plain request.
+
+    Returns the history and whether it came from a complete stream.
+    """
+    # The stream holds an outbound slot for as long as it runs
+    async with _rpc_semaphore:
+        history, complete = await _stream_history(
+            history_msg,
+            deepseek_location_info_stream(
+                data["city"],
+                data["street"],
+                display_name,
+                place["address"]["label"],
+                place.get("original_title"),
+                http_client,
+                lang,
+            ),
+            place_label,
+            lang,
+        )
+    if complete and history:
+        return history, True
+
+    history = await _guarded(
+        deepseek_location_info(
+            data["city"],
+            data["street"],
+            display_name,
+            place["address"]["label"],
+            place.get("original_title"),
+            http_client,
+            lang,
+        )
+    )
+    return history, False
+
+
+async def _stream_history(status_message, stream, place_label, lang):
+    """Progressively edit the status message with streamed history text.
+
+    Returns the text received and whether the stream finished cleanly.
+    """
+    loop = asyncio.get_running_loop()
+    history = ""
+    pending_chars = 0
+    last_edit = loop.time()
+
+    try:
+        async for chunk in stream:
+            history += chunk
+            pending_chars += len(chunk)
+
+            # Telegram allows roughly one edit per second per chat
+            now = loop.time()
+            if (
+                pending_chars >= STREAM_EDIT_MIN_CHARS
+                and now - last_edit >= STREAM_EDIT_INTERVAL
+            ):
+                try:
+                    await status_message.edit_text(
+                        format_message(
+                            "about_place", lang, place_name=place_label, history=history
+                        ),
+                        parse_mode="HTML",
+                    )
+                except Exception as edit_error:
+                    logger.debug("Error editing streamed history: %s", edit_error)
+                pending_chars = 0
+                last_edit = now
+    except Exception as e:
+        logger.error(f"Error streaming place history: {e}")
+        return history, False
+
+    return history, True
+
+
+class _StreamingVoiceFile(InputFile):
+    """Voice upload fed by a speech synthesis stream that may still be running.
+
+    Chunks are buffered as they arrive, so the upload can start before the
+    synthesis finishes and a retry can replay what was already received.
+    """
+
+    def __init__(self, chunks, filename="voice_message.mp3"):
+        super().__init__(filename=filename)
+        self._buffer = bytearray()
+        self._error = None
+        self._done = asyncio.Event()
+        self._grew = asyncio.Event()
+        self._pump_task = asyncio.create_task(self._pump(chunks))
+
+    async def _pump(self, chunks):
+        try:
+            async with _rpc_semaphore:
+                async for chunk in chunks:
+                    self._buffer += chunk
+                    if len(self._buffer) > MAX_VOICE_BYTES:
+                        raise ValueError("Synthesized audio is too large")
+                    self._grew.set()
+        except Exception as e:
+            logger.error(f"Error streaming synthesized speech: {e}")
+            self._error = e
+        finally:
+            self._done.set()
+            self._grew.set()
+
+    async def has_audio(self):
+        """Wait for the first chunk and report whether synthesis produced any."""
+        while not self._buffer and not self._done.is_set():
+            self._grew.clear()
+            await self._grew.wait()
+        return bool(self._buffer) and self._error is None
+
+    @property
+    def failed(self):
+        return self._error is not None
+
+    def cancel(self):
+        self._pump_task.cancel()
+
+    async def read(self, bot):
+        offset = 0
+        while True:
+            if offset < len(self._buffer):
+                chunk = bytes(self._buffer[offset : offset + self.chunk_size])
+                offset += len(chunk)
+                yield chunk
+            elif self._error is not None:
+                # Never upload truncated audio
+                raise self._error
+            elif self._done.is_set():
+                return
+            else:
+                self._grew.clear()
+                await self._grew.wait()
+
+
+async def _send_voice(message, voice, lang):
+    """Send synthesized audio bytes or a Telegram file_id as a voice message.
+
+    Returns the sent message, or None if sending failed.
+    """
+    if isinstance(voice, bytes):
+        if len(voice) > MAX_VOICE_BYTES:
+            await message.answer(get_message("audio_too_large", lang))
+            return None
+        voice = BufferedInputFile(voice, filename="voice_message.mp3")
+
+    for attempt in range(VOICE_SEND_ATTEMPTS):
+        try:
+            return await message.answer_voice(voice=voice)
+        except TelegramRetryAfter as e:
+            # Flood control tells us exactly how long to wait
+            delay = e.retry_after
+            error = e
+        except TelegramEntityTooLarge:
+            await message.answer(get_message("audio_too_large", lang))
+            return None
+        except TelegramForbiddenError as e:
+            # The user blocked the bot; nothing more can be sent
+            logger.warning(f"Cannot send voice message: {e}")
+            return None
+        except (TelegramNetworkError, TelegramServerError) as e:
+            # Transient: exponential backoff with jitter, capped
+            delay = min(VOICE_RETRY_MAX_DELAY, 0.25 * 4**attempt)
+            delay += random.uniform(0, delay / 2)
+            error = e
+        except Exception as e:
+            # Bad requests and the like will fail the same way again
+            error = e
+            break
+
+        # A broken synthesis stream cannot succeed on retry
+        if isinstance(voice, _StreamingVoiceFile) and voice.failed:
+            break
+
+        if attempt < VOICE_SEND_ATTEMPTS - 1:
+            await asyncio.sleep(delay)
+
+    logger.error(f"Failed to send audio: {error}")
+    await message.answer(get_message("voice_tired", lang))
+    return None
+
+
+@router.callback_query(PlaceCallback.filter(F.action == "more"))
+async def handle_tell_more(callback: CallbackQuery, callback_data: PlaceCallback):
     """Handle request for more information about a place."""
     request_key = None
-    http_client = None
+    route_task = None
+    voice_stream = None
     user_id = callback.from_user.id
     lang = get_user_language(user_id)
 
     try:
-        _, index = callback.data.split("_")
-        index = int(index)
+        index = callback_data.index
 
         if user_id not in user_data:
             await callback.answer(
@@ -404,22 +949,19 @@ async def handle_tell_more(callback: CallbackQuery):
         request_key = f"{user_id}_{index}"
 
         if request_key in active_deepseek_requests:
-            if active_deepseek_requests[request_key]["active"]:
-                await callback.answer(
-                    get_message("request_in_progress", lang), show_alert=True
-                )
-                return
-
-            last_request_time = active_deepseek_requests[request_key]["timestamp"]
-            current_time = asyncio.get_event_loop().time()
+            await callback.answer(
+                get_message("request_in_progress", lang), show_alert=True
+            )
+            return
 
-            if current_time - last_request_time < 300:
-                remaining = int(300 - (current_time - last_request_time))
-                await callback.answer(
-                    get_message("cooldown", lang).format(seconds=remaining),
-                    show_alert=True,
-                )
-                return
+        completed_at = deepseek_cooldowns.get(request_key)
+        if completed_at is not None:
+            remaining = int(DEEPSEEK_COOLDOWN - (time.monotonic() - completed_at))
+            await callback.answer(
+                format_message("cooldown", lang, seconds=max(remaining, 1)),
+                show_alert=True,
+            )
+            return
 
         await callback.answer(get_message("gathering_thoughts", lang))
 
@@ -429,88 +971,38 @@ async def handle_tell_more(callback: CallbackQuery):
 
         user_lat = data["latitude"]
         user_lng = data["longitude"]
-        place_lat = place["position"]["lat"]
-        place_lng = place["position"]["lng"]
-
-        active_deepseek_requests[request_key] = {
-            "active": True,
-            "timestamp": asyncio.get_event_loop().time(),
-        }
 
-        http_client = await get_http_client()
+        active_deepseek_requests[request_key] = True
 
-        walking_polyline = await get_walking_directions_polyline(
-            user_lat, user_lng, place_lat, place_lng, http_client
-        )
+        http_client = data.get("http_client") or await get_http_client()
 
-        route_map_image = None
-        if walking_polyline:
-            route_map_image = await get_static_map_image(
-                places=[place],
-                user_lat=user_lat,
-                user_lng=user_lng,
-                http_client=http_client,
-                path_polyline=walking_polyline,
+        # Fetch the walking route while the place details are being resolved,
+        # unless Telegram already holds the rendered map for this place
+        if not place.get("route_map_file_id"):
+            route_task = _spawn_background(
+                _fetch_route_map(
+                    place, user_lat, user_lng, http_client, data.get("polylines")
+                )
             )
 
-        google_maps_url = (
-            f"https://www.google.com/maps/search/?api=1&query={place_lat},{place_lng}"
-        )
-        next_text = (
-            get_message("next_location", lang)
-            if index < len(places) - 1
-            else get_message("back_to_first", lang)
-        )
-        new_keyboard = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text=get_message("show_maps_btn", lang), url=google_maps_url
-                    ),
-                ],
-                [
-                    InlineKeyboardButton(
-                        text=next_text,
-                        callback_data=f"next_{(index + 1) % len(places)}",
-                    )
-                ],
-            ]
-        )
+        new_keyboard = _build_history_keyboard(index, places, lang)
         try:
             if callback.message:
                 await callback.message.edit_reply_markup(reply_markup=new_keyboard)
         except Exception as e:
             logger.error(f"Error updating buttons: {e}")
 
-        if (
-            not "title" in place
-            or place["title"] == place.get("original_title")
-            or place["address"].get("label") == "Address will be fetched"
-        ):
+        # The history prompt also needs the translated street and city
+        await _await_background_translation(data, index)
+
+        if not place.get("_translated"):
             status_msg = await callback.message.answer(
                 get_message("checking_details", lang)
             )
-            detailed_address, _ = await get_detailed_address(
-                place_lat, place_lng, http_client
-            )
+            await _ensure_place_translated(place, http_client)
 
-            if not "original_title" in place:
-                place["original_title"] = place["title"]
-            place["original_address"] = detailed_address
-
-            translation_tasks = [
-                translate_to_english(place["original_title"]),
-                translate_to_english(detailed_address),
-            ]
-
-            english_name, english_address = await asyncio.gather(*translation_tasks)
-            place["title"] = english_name
-            place["address"] = {"label": english_address}
-
-            try:
+            with contextlib.suppress(Exception):
                 await status_msg.delete()
-            except Exception:
-                pass
 
         # Determine which name to show based on language
         if lang == "ru":
@@ -518,14 +1010,39 @@ async def handle_tell_more(callback: CallbackQuery):
         else:
             display_name = place["title"]
 
-        # Number emojis for places
-        number_emojis = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣"]
-        current_emoji = (
-            number_emojis[index] if index < len(number_emojis) else str(index + 1)
-        )
+        place_label = f"{_place_emoji(index)} {display_name}"
+
+        route_photo = place.get("route_map_file_id")
+        if route_task:
+            route_map_image = await route_task
+            if route_map_image:
+                route_photo = BufferedInputFile(
+                    route_map_image, filename="route_map.png"
+                )
+
+        if route_photo:
+            try:
+                sent_route = await callback.message.answer_photo(
+                    photo=route_photo, caption=f"🚶 Walking route to {display_name}"
+                )
+                place["route_map_file_id"] = sent_route.photo[-1].file_id
+            except Exception as map_error:
+                logger.error(f"Error sending route map image: {map_error}")
 
-        if "history" in place and place["history"]:
-            history = place["history"]
+        # Histories are shared across users who open the same place
+        db = data.get("db")
+        history_key = _history_cache_key(place, lang)
+        if not place.get("history") and db:
+            cached = await asyncio.to_thread(db.get_place_history, history_key)
+            if cached:
+                place["history"], place["voice_file_id"] = cached
+
+        history_streamed = False
+        if history := place.get("history"):
+            if not place.get("audio_sent") and not place.get("voice_file_id"):
+                voice_stream = _StreamingVoiceFile(
+                    yandex_speechkit_tts_stream(history, http_client, lang)
+                )
             history_msg = await callback.message.answer(
                 get_message("remembered_place", lang)
             )
@@ -533,72 +1050,113 @@ async def handle_tell_more(callback: CallbackQuery):
             history_msg = await callback.message.answer(
                 get_message("digging_memories", lang)
             )
-            history = await deepseek_location_info(
-                data["city"],
-                data["street"],
-                display_name,
-                place["address"]["label"],
-                place.get("original_title"),
-                http_client,
-                lang,
-            )
+            # Another user asking about the same place shares the answer
+            # already being generated instead of a second DeepSeek call
+            history = None
+            pending_history = _history_inflight.get(history_key)
+            if pending_history:
+                history = await asyncio.shield(pending_history)
+
+            if not history:
+                pending_history = asyncio.get_running_loop().create_future()
+                _history_inflight.setdefault(history_key, pending_history)
+                try:
+                    history, history_streamed = await _generate_history(
+                        history_msg,
+                        data,
+                        place,
+                        display_name,
+                        place_label,
+                        http_client,
+                        lang,
+                    )
+                finally:
+                    if _history_inflight.get(history_key) is pending_history:
+                        del _history_inflight[history_key]
+                    # Waiters only share a stream that reached its terminator;
+                    # otherwise they generate their own answer
+                    pending_history.set_result(history if history_streamed else None)
             place["history"] = history
 
-        history_message_text = get_message("about_place", lang).format(
-            place_name=f"{current_emoji} {display_name}", history=history
+        # Start speech synthesis right away so it overlaps with sending the text
+        if (
+            voice_stream is None
+            and not place.get("audio_sent")
+            and not place.get("voice_file_id")
+        ):
+            voice_stream = _StreamingVoiceFile(
+                yandex_speechkit_tts_stream(history, http_client, lang)
+            )
+
+        history_message_text = format_message(
+            "about_place", lang, place_name=place_label, history=history
         )
 
-        if route_map_image:
+        if history_streamed:
             try:
-                photo = BufferedInputFile(route_map_image, filename="route_map.png")
-                await callback.message.answer_photo(
-                    photo=photo, caption=f"🚶 Walking route to {display_name}"
+                await history_msg.edit_text(history_message_text, parse_mode="HTML")
+                history_msg = None
+            except Exception as edit_error:
+                logger.error(f"Error finalizing streamed history: {edit_error}")
+
+        if history_msg:
+            await callback.message.answer(history_message_text, parse_mode="HTML")
+
+            with contextlib.suppress(Exception):
+                await history_msg.delete()
+
+        # The upload starts as soon as the first audio arrives and follows
+        # the synthesis from there
+        voice = None
+        if voice_stream:
+            if await voice_stream.has_audio():
+                voice = voice_stream
+        elif not place.get("audio_sent"):
+            voice = place.get("voice_file_id")
+
+        if voice:
+            sent_voice = await _send_voice(callback.message, voice, lang)
+            if sent_voice:
+                place["audio_sent"] = True
+                if voice is voice_stream and sent_voice.voice and db:
+                    place["voice_file_id"] = sent_voice.voice.file_id
+                    if not history_streamed:
+                        _spawn_background(
+                            asyncio.to_thread(
+                                db.save_place_history_voice,
+                                history_key,
+                                place["voice_file_id"],
+                            )
+                        )
+
+        # Only cache verified-complete streams, never cut-off or error text.
+        # The history and its voice file_id go in one write so neither can
+        # overtake the other.
+        if history_streamed and db:
+            _spawn_background(
+                asyncio.to_thread(
+                    db.save_place_history,
+                    history_key,
+                    lang,
+                    history,
+                    place.get("voice_file_id"),
                 )
-            except Exception as map_error:
-                logger.error(f"Error sending route map image: {map_error}")
-
-        await callback.message.answer(history_message_text, parse_mode="HTML")
+            )
 
-        try:
-            await history_msg.delete()
-        except Exception:
-            pass
-
-        if not place.get("audio_sent", False):
-            audio_bytes = await yandex_speechkit_tts(history, http_client, lang)
-            if audio_bytes:
-                if len(audio_bytes) > 50 * 1024 * 1024:
-                    await callback.message.answer(get_message("audio_too_large", lang))
-                else:
-                    for attempt in range(3):
-                        try:
-                            audio_file = BufferedInputFile(
-                                audio_bytes, filename="voice_message.mp3"
-                            )
-                            await callback.message.answer_voice(voice=audio_file)
-                            place["audio_sent"] = True
-                            break
-                        except Exception as e:
-                            if attempt == 2:
-                                logger.error(
-                                    f"Failed to send audio after 3 attempts: {e}"
-                                )
-                                await callback.message.answer(
-                                    get_message("voice_tired", lang)
-                                )
-                            await asyncio.sleep(2)
-
-        active_deepseek_requests[request_key]["active"] = False
+        active_deepseek_requests.pop(request_key, None)
+        deepseek_cooldowns[request_key] = time.monotonic()
 
     except Exception as e:
-        if request_key and request_key in active_deepseek_requests:
-            active_deepseek_requests[request_key]["active"] = False
+        if route_task and not route_task.done():
+            route_task.cancel()
+        if voice_stream:
+            voice_stream.cancel()
+
+        if request_key:
+            active_deepseek_requests.pop(request_key, None)
 
         logger.error(f"Error in tell more handler: {e}", exc_info=True)
         await callback.message.answer(get_message("forgot_to_say", lang))
-    finally:
-        if http_client:
-            await http_client.aclose()
 
 
 @router.message()
@@ -609,7 +1167,8 @@ async def handle_unknown(message: Message, db=None):
         lang = get_user_language(user_id)
 
         if db:
-            db.add_or_update_user(
+            await asyncio.to_thread(
+                db.add_or_update_user,
                 user_id,
                 message.from_user.username,
                 message.from_user.first_name,
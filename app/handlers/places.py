@@ -2,30 +2,28 @@
 Place preferences and settings handlers.
 """
 
+import asyncio
 from aiogram import F
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import Command
-from app.languages import get_message, get_user_language
+from app.languages import get_message, format_message, get_user_language
 from app import logger
-from .state import router, user_preferences
-from .common import create_place_types_keyboard
+from .state import router, user_preferences, PreferenceCallback, PREFERENCE_BITS
+from .common import (
+    create_place_types_keyboard,
+    ensure_user_preferences,
+    enabled_categories,
+)
 
 
 @router.message(Command("places"))
-async def handle_places_command(message: Message):
+async def handle_places_command(message: Message, db=None):
     """Handle the /places command to set place preferences."""
     user_id = message.from_user.id
     lang = get_user_language(user_id)
     logger.info(f"Received '/places' command from user: {user_id}")
 
-    if user_id not in user_preferences:
-        user_preferences[user_id] = {
-            "nature": True,
-            "religion": True,
-            "culture": True,
-            "history": True,
-            "must_visit": True,
-        }
+    await ensure_user_preferences(user_id, db)
 
     keyboard = create_place_types_keyboard(user_id, lang)
     await message.answer(
@@ -34,45 +32,51 @@ async def handle_places_command(message: Message):
     )
 
 
-@router.callback_query(F.data.startswith("toggle_"))
-async def handle_toggle_preference(callback: CallbackQuery):
+@router.callback_query(PreferenceCallback.filter(F.action == "toggle"))
+async def handle_toggle_preference(
+    callback: CallbackQuery, callback_data: PreferenceCallback, db=None
+):
     """Handle toggling of place type preferences."""
     user_id = callback.from_user.id
-    lang = get_user_language(user_id)
-    pref_type = callback.data.split("_")[1]
-
-    if user_id not in user_preferences:
-        user_preferences[user_id] = {
-            "nature": True,
-            "religion": True,
-            "culture": True,
-            "history": True,
-            "must_visit": True,
-        }
+    bit = PREFERENCE_BITS.get(callback_data.category)
+    if bit is None:
+        await callback.answer()
+        return
 
-    user_preferences[user_id][pref_type] = not user_preferences[user_id][pref_type]
-    keyboard = create_place_types_keyboard(user_id, lang)
+    mask = user_preferences[user_id] = (
+        await ensure_user_preferences(user_id, db) ^ bit
+    )
+    keyboard = create_place_types_keyboard(user_id, get_user_language(user_id), mask)
 
     try:
         await callback.message.edit_reply_markup(reply_markup=keyboard)
     except Exception as e:
-        logger.debug(f"Error editing reply markup, probably not modified: {e}")
+        logger.debug("Error editing reply markup, probably not modified: %s", e)
     await callback.answer()
 
 
-@router.callback_query(F.data == "save_settings")
-async def handle_save_settings(callback: CallbackQuery):
+@router.callback_query(PreferenceCallback.filter(F.action == "save"))
+async def handle_save_settings(callback: CallbackQuery, db=None):
     """Handle saving of place type preferences."""
     user_id = callback.from_user.id
     lang = get_user_language(user_id)
-    prefs = user_preferences.get(user_id, {})
-    selected = [get_message(cat, lang) for cat, enabled in prefs.items() if enabled]
+    mask = await ensure_user_preferences(user_id, db)
+    if db:
+        # Stored as a category -> enabled dict so the saved format is stable
+        saved = {
+            category: bool(mask & bit) for category, bit in PREFERENCE_BITS.items()
+        }
+        await asyncio.to_thread(db.save_user_preferences, user_id, saved)
+
+    selected = [get_message(cat, lang) for cat in enabled_categories(mask)]
 
     if not selected:
         await callback.message.edit_text(get_message("settings_saved_none", lang))
     else:
         categories = ", ".join(selected)
         await callback.message.edit_text(
-            get_message("settings_saved_with_prefs", lang).format(categories=categories)
+            format_message(
+                "settings_saved_with_prefs", lang, categories=categories
+            )
         )
     await callback.answer()
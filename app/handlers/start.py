@@ -2,13 +2,17 @@
 Start command and language selection handlers.
 """
 
-from aiogram import F
+import asyncio
 from aiogram.types import Message, CallbackQuery
 from aiogram.filters import CommandStart, Command
 from app.languages import get_message, get_user_language, set_user_language
 from app import logger
-from .state import router, user_preferences
-from .common import create_language_keyboard, create_place_types_keyboard
+from .state import router, LanguageCallback
+from .common import (
+    create_language_keyboard,
+    create_place_types_keyboard,
+    ensure_user_preferences,
+)
 
 
 @router.message(CommandStart())
@@ -23,17 +27,12 @@ async def handle_start_command(message: Message, db=None):
         logger.info(f"Received '/start' command from user: {user_id}")
 
         if db:
-            db.add_or_update_user(user_id, username, first_name, last_name)
+            await asyncio.to_thread(
+                db.add_or_update_user, user_id, username, first_name, last_name
+            )
 
         # Initialize user preferences if not already set
-        if message.from_user.id not in user_preferences:
-            user_preferences[message.from_user.id] = {
-                "nature": True,
-                "religion": True,
-                "culture": True,
-                "history": True,
-                "must_visit": True,
-            }
+        await ensure_user_preferences(user_id, db)
 
         # Show language selection first
         keyboard = create_language_keyboard()
@@ -53,11 +52,13 @@ async def handle_languages_command(message: Message):
     await message.answer("🐦", reply_markup=keyboard)
 
 
-@router.callback_query(F.data.startswith("lang_"))
-async def handle_language_selection(callback: CallbackQuery):
+@router.callback_query(LanguageCallback.filter())
+async def handle_language_selection(
+    callback: CallbackQuery, callback_data: LanguageCallback, db=None
+):
     """Handle language selection callback."""
     user_id = callback.from_user.id
-    lang = callback.data.split("_")[1]
+    lang = callback_data.code
 
     set_user_language(user_id, lang)
     await callback.message.edit_text(get_message("language_selected", lang))
@@ -66,14 +67,7 @@ async def handle_language_selection(callback: CallbackQuery):
     await callback.message.answer(get_message("start", lang))
 
     # Initialize user preferences if not already set
-    if user_id not in user_preferences:
-        user_preferences[user_id] = {
-            "nature": True,
-            "religion": True,
-            "culture": True,
-            "history": True,
-            "must_visit": True,
-        }
+    await ensure_user_preferences(user_id, db)
 
     # Show POI settings right after welcome message
     keyboard = create_place_types_keyboard(user_id, lang)
@@ -6,17 +6,62 @@ from typing import Dict, Any
 
 # Create main router
 from aiogram import Router
+from aiogram.filters.callback_data import CallbackData
+from app.cache import TTLCache
 
 router = Router()
 
-# Store user data
-user_data: Dict[int, Dict[str, Any]] = {}
 
-# Store active DeepSeek requests to prevent duplicates
-active_deepseek_requests: Dict[str, Dict[str, Any]] = {}
+class PlaceCallback(CallbackData, prefix="place"):
+    """Callback data for the buttons under a place card."""
 
-# Store user POI preferences
-user_preferences: Dict[int, Dict[str, bool]] = {}
+    action: str
+    index: int
+
+
+class PreferenceCallback(CallbackData, prefix="pref"):
+    """Callback data for the place type settings keyboard."""
+
+    action: str
+    category: str = ""
+
+
+class LanguageCallback(CallbackData, prefix="lang"):
+    """Callback data for the language selection buttons."""
+
+    code: str
+
+
+# Store user data, expiring an hour after the last location search
+user_data: Dict[int, Dict[str, Any]] = TTLCache(maxsize=10_000, ttl=60 * 60)
+
+# Store active DeepSeek requests to prevent duplicates. Entries expire so a
+# crashed handler cannot block a place forever.
+active_deepseek_requests: Dict[str, bool] = TTLCache(maxsize=10_000, ttl=2 * 60)
+
+# Store completion times of DeepSeek requests for the cooldown window
+DEEPSEEK_COOLDOWN = 300
+deepseek_cooldowns: Dict[str, float] = TTLCache(
+    maxsize=10_000, ttl=DEEPSEEK_COOLDOWN
+)
+
+# Bit of each POI category in a preferences mask, in display order
+PREFERENCE_BITS = {
+    "nature": 1,
+    "religion": 2,
+    "culture": 4,
+    "history": 8,
+    "must_visit": 16,
+}
+
+# POI preferences of users who have not changed them: every category
+DEFAULT_PREFERENCES = sum(PREFERENCE_BITS.values())
+
+# Recently used POI preference masks. Saved preferences live in the database
+# and are loaded back on a miss.
+user_preferences: Dict[int, int] = TTLCache(
+    maxsize=10_000, ttl=24 * 60 * 60
+)
 
 # Define POI category mappings
 POI_CATEGORY_MAPPING = {
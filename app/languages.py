@@ -3,14 +3,17 @@ Language management module for the Tourist Guide Bot.
 Handles translations, language preferences, and message templates.
 """
 
+from types import MappingProxyType
 from typing import Dict, Any
 
 # Core configuration
 DEFAULT_LANGUAGE = "ru"
 AVAILABLE_LANGUAGES = {"ru": "🇷🇺 Привет!", "en": "🇬🇧 Hello!"}
 
-# User preferences storage
+# Languages of users who picked a non-default one. Values are the shared
+# AVAILABLE_LANGUAGES key objects, not per-user string copies.
 user_languages: Dict[int, str] = {}
+_LANGUAGE_CODES = {code: code for code in AVAILABLE_LANGUAGES}
 
 # Common message components
 EMOJI_MAP = {
@@ -56,6 +59,7 @@ API_PROMPTS = {
 Preserve proper nouns but translate everything else. Keep the translation concise and accurate. 
 Only respond with the translation, nothing else.""",
     "translate_prompt": "Translate this to English: {text}",
+    "translate_batch_prompt": "Translate each string in this JSON array to English. Respond with a JSON array of the translations in the same order: {texts}",
     "location_system_prompt_en": """You are a time traveller that has seen the past and knows everything about the {city}. 
 Provide a concise historical overview of {poi_name}, located at {poi_address}. {context}
 Structure your response as follows: First make a short yet catchy explanation of the place, that teases what you will talk about later. 
@@ -85,7 +89,6 @@ MESSAGES = {
         "error_next_place": f"{EMOJI_MAP['bird']} Squawk! There was an error showing the next place. Please try again.",
         "forgot_to_say": f"{EMOJI_MAP['bird']} Squawk! I forgot what I was going to say. Please try again.",
         "scouting": f"{EMOJI_MAP['bird']} Taking off to scout the area!",
-        "searching_wider": f"{EMOJI_MAP['bird']} Found a few spots nearby, but searching wider for more options...",
         "searching_farthest": f"{EMOJI_MAP['bird']} Just a few more seconds while I search farther away...",
         "generating_map": f"{EMOJI_MAP['bird']} Creating a map of all the spots I found...",
         "no_places": f"{EMOJI_MAP['bird']} Well... Even us city birds don't hang around here much. Try dropping your pin somewhere else!",
@@ -131,7 +134,6 @@ MESSAGES = {
         "error_next_place": f"{EMOJI_MAP['bird']} Курлык! Произошла ошибка при показе следующего места. Пожалуйста, попробуй снова.",
         "forgot_to_say": f"{EMOJI_MAP['bird']} Курлык! Я забыл, что хотел сказать. Пожалуйста, попробуй снова.",
         "scouting": f"{EMOJI_MAP['bird']} Взлетаю на разведку местности!",
-        "searching_wider": f"{EMOJI_MAP['bird']} Нашел несколько мест поблизости, но ищу еще...",
         "searching_farthest": f"{EMOJI_MAP['bird']} Еще несколько секунд, пока я ищу подальше...",
         "generating_map": f"{EMOJI_MAP['bird']} Создаю карту всех найденных мест...",
         "no_places": f"{EMOJI_MAP['bird']} Ну... Даже мы, городские птицы, здесь не часто бываем. Попробуйте отметить другое место!",
@@ -167,12 +169,48 @@ MESSAGES = {
     },
 }
 
+# The message tables are read-only after import
+BASE_MESSAGES = MappingProxyType(BASE_MESSAGES)
+API_PROMPTS = MappingProxyType(API_PROMPTS)
+MESSAGES = MappingProxyType(
+    {lang: MappingProxyType(messages) for lang, messages in MESSAGES.items()}
+)
+
+# Flat (lang, key) lookup table so get_message is a single dict fetch
+_FLAT_MESSAGES = {
+    (lang, key): text
+    for lang, messages in MESSAGES.items()
+    for key, text in messages.items()
+}
+
 
 def get_message(key: str, lang: str = DEFAULT_LANGUAGE) -> str:
     """Get a message in the specified language with fallback to default language."""
-    return MESSAGES.get(lang, MESSAGES[DEFAULT_LANGUAGE]).get(
-        key, MESSAGES[DEFAULT_LANGUAGE].get(key, f"Message not found: {key}")
+    text = _FLAT_MESSAGES.get((lang, key))
+    if text is None:
+        text = _FLAT_MESSAGES.get(
+            (DEFAULT_LANGUAGE, key), f"Message not found: {key}"
+        )
+    return text
+
+
+# Lookup table of each template message's bound format_map by (lang, key).
+# Nothing is precompiled: str.format still parses the template on every call.
+_MESSAGE_FORMATTERS = {
+    lang_key: text.format_map
+    for lang_key, text in _FLAT_MESSAGES.items()
+    if "{" in text
+}
+
+
+def format_message(key: str, lang: str = DEFAULT_LANGUAGE, **values: Any) -> str:
+    """Get a template message in the specified language filled in with values."""
+    formatter = _MESSAGE_FORMATTERS.get((lang, key)) or _MESSAGE_FORMATTERS.get(
+        (DEFAULT_LANGUAGE, key)
     )
+    if formatter is None:
+        return get_message(key, lang)
+    return formatter(values)
 
 
 def get_api_message(key: str) -> str:
@@ -185,6 +223,21 @@ def get_api_prompt(key: str) -> str:
     return API_PROMPTS.get(key, f"API prompt not found: {key}")
 
 
+# Lookup table of each prompt template's bound format_map; the templates
+# are still parsed on every call
+_PROMPT_FORMATTERS = {
+    key: text.format_map for key, text in API_PROMPTS.items() if "{" in text
+}
+
+
+def format_api_prompt(key: str, **values: Any) -> str:
+    """Get an API prompt template filled in with values."""
+    formatter = _PROMPT_FORMATTERS.get(key)
+    if formatter is None:
+        return get_api_prompt(key)
+    return formatter(values)
+
+
 def get_user_language(user_id: int) -> str:
     """Get user's preferred language with fallback to default."""
     return user_languages.get(user_id, DEFAULT_LANGUAGE)
@@ -192,5 +245,10 @@ def get_user_language(user_id: int) -> str:
 
 def set_user_language(user_id: int, language: str) -> None:
     """Set user's preferred language if it's available."""
-    if language in AVAILABLE_LANGUAGES:
+    language = _LANGUAGE_CODES.get(language)
+    if language is None:
+        return
+    if language == DEFAULT_LANGUAGE:
+        user_languages.pop(user_id, None)
+    else:
         user_languages[user_id] = language
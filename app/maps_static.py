@@ -1,7 +1,31 @@
+import asyncio
+import bisect
+import functools
 import os
 import urllib.parse
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from app import logger
+from app.cache import TTLCache
+from app.generators import get_http_client
+from app.geo import cheap_ruler_distances
+
+STATIC_MAP_URL = "https://maps.googleapis.com/maps/api/staticmap?"
+
+# Static map images being fetched, keyed by their URL
+_map_inflight = {}
+
+# Recently fetched static map images (PNGs of a few hundred KB), by URL
+_map_image_cache = TTLCache(maxsize=64, ttl=60 * 60)
+
+# Zoom level for the furthest place: below each distance in km the zoom at
+# the same index applies, beyond the last one the final zoom does
+_ZOOM_THRESHOLDS_KM = (0.5, 1, 2, 5, 10)
+_ZOOM_LEVELS = (15, 14, 13, 12, 11, 10)
+
+
+def zoom_for_distance(max_distance_km: float) -> int:
+    """Return the map zoom level that fits places up to the given distance."""
+    return _ZOOM_LEVELS[bisect.bisect_right(_ZOOM_THRESHOLDS_KM, max_distance_km)]
 
 
 def create_static_map_url(
@@ -40,29 +64,56 @@ def create_static_map_url(
         logger.error("No places provided for static map")
         return None
 
-    # Use custom marker labels (numbers)
+    positions = [place["position"] for place in places]
+    places_key = tuple((position["lat"], position["lng"]) for position in positions)
+    url = _build_static_map_url(
+        api_key,
+        places_key,
+        user_lat,
+        user_lng,
+        zoom,
+        size,
+        map_type,
+        scale,
+        path_polyline,
+    )
+
+    logger.debug("Generated Static Map URL (truncated): %.100s...", url)
+    return url
+
+
+@functools.lru_cache(maxsize=256)
+def _build_static_map_url(
+    api_key: str,
+    places_key: Tuple[Tuple[float, float], ...],
+    user_lat: float,
+    user_lng: float,
+    zoom: int,
+    size: str,
+    map_type: str,
+    scale: int,
+    path_polyline: str | None,
+) -> str:
+    """Build the static map URL for place coordinates; the inputs fully determine it."""
+    # Use custom marker labels (numbers), accumulating the center as we go
     markers = []
+    sum_lat, sum_lng = user_lat, user_lng
 
     # Add each place as a separate blue marker with its number
-    for i, place in enumerate(places):
-        lat = place["position"]["lat"]
-        lng = place["position"]["lng"]
-        marker_label = str(i + 1)
-        markers.append(f"color:blue|label:{marker_label}|{lat},{lng}")
+    for i, (lat, lng) in enumerate(places_key, start=1):
+        sum_lat += lat
+        sum_lng += lng
+        markers.append(f"color:blue|label:{i}|{lat},{lng}")
 
     # Add user location marker with custom pin icon
     user_marker = f"icon:https://em-content.zobj.net/source/apple/126/round-pushpin_1f4cd.png|{user_lat},{user_lng}"
     markers.append(user_marker)
 
-    # Calculate center point that includes all markers
-    all_lats = [place["position"]["lat"] for place in places] + [user_lat]
-    all_lngs = [place["position"]["lng"] for place in places] + [user_lng]
-
-    center_lat = sum(all_lats) / len(all_lats)
-    center_lng = sum(all_lngs) / len(all_lngs)
+    # Center point that includes all markers, the user's included
+    center_lat = sum_lat / len(markers)
+    center_lng = sum_lng / len(markers)
 
-    # Build the API URL
-    base_url = "https://maps.googleapis.com/maps/api/staticmap?"
+    # Build the API URL, encoding all repeated markers in one pass
     params = {
         "center": f"{center_lat},{center_lng}",
         "zoom": str(zoom),
@@ -70,20 +121,21 @@ def create_static_map_url(
         "maptype": map_type,
         "scale": str(scale),
         "key": api_key,
+        "markers": markers,
     }
 
-    url = base_url + urllib.parse.urlencode(params)
-
-    # Add markers to the URL
-    for marker in markers:
-        url += f"&markers={urllib.parse.quote(marker)}"
+    parts = [
+        STATIC_MAP_URL,
+        urllib.parse.urlencode(
+            params, doseq=True, safe="/", quote_via=urllib.parse.quote
+        ),
+    ]
 
     # Add path if polyline is provided
     if path_polyline:
-        url += f"&path=enc:{urllib.parse.quote(path_polyline)}"
+        parts.append(f"&path=enc:{urllib.parse.quote(path_polyline)}")
 
-    logger.debug(f"Generated Static Map URL (truncated): {url[:100]}...")
-    return url
+    return "".join(parts)
 
 
 async def get_static_map_image(
@@ -106,43 +158,18 @@ async def get_static_map_image(
     Returns:
         Image data as bytes or None if failed
     """
-    import httpx
-
-    should_close_client = False
-
     if not http_client:
-        http_client = httpx.AsyncClient(timeout=30.0)
-        should_close_client = True
+        http_client = await get_http_client()
 
     try:
         # Calculate appropriate zoom level based on distance
-        # between user and furthest place
-        from geopy.distance import geodesic
-
-        max_distance = 0
-        for place in places:
-            place_lat = place["position"]["lat"]
-            place_lng = place["position"]["lng"]
-
-            distance = geodesic((user_lat, user_lng), (place_lat, place_lng)).kilometers
-
-            max_distance = max(max_distance, distance)
+        # between user and furthest place. Only a coarse bucket is needed,
+        # so the flat-earth approximation is plenty.
+        distances = cheap_ruler_distances(user_lat, user_lng, places)
+        max_distance = float(distances.max()) / 1000 if len(distances) else 0
 
         # Adjust zoom level based on maximum distance
-        zoom = 14  # Default zoom level
-
-        if max_distance < 0.5:
-            zoom = 15
-        elif max_distance < 1:
-            zoom = 14
-        elif max_distance < 2:
-            zoom = 13
-        elif max_distance < 5:
-            zoom = 12
-        elif max_distance < 10:
-            zoom = 11
-        else:
-            zoom = 10
+        zoom = zoom_for_distance(max_distance)
 
         # Create map URL with user location included
         map_url = create_static_map_url(
@@ -156,20 +183,33 @@ async def get_static_map_image(
         if not map_url:
             return None
 
-        # Fetch the image
-        response = await http_client.get(map_url)
-
-        if response.status_code == 200:
-            return response.content
-        else:
-            logger.error(
-                f"Failed to get static map: {response.status_code} - {response.text[:100]}"
-            )
-            return None
+        cached_image = _map_image_cache.get(map_url)
+        if cached_image is not None:
+            return cached_image
+
+        # The same map is already being fetched, e.g. after a double tap
+        pending_image = _map_inflight.get(map_url)
+        if pending_image:
+            return await asyncio.shield(pending_image)
+
+        pending_image = asyncio.get_running_loop().create_future()
+        _map_inflight[map_url] = pending_image
+        image = None
+        try:
+            # Fetch the image
+            response = await http_client.get(map_url)
+
+            if response.status_code == 200:
+                image = _map_image_cache[map_url] = response.content
+            else:
+                logger.error(
+                    f"Failed to get static map: {response.status_code} - {response.text[:100]}"
+                )
+            return image
+        finally:
+            del _map_inflight[map_url]
+            pending_image.set_result(image)
 
     except Exception as e:
         logger.error(f"Error fetching static map: {str(e)}", exc_info=True)
         return None
-    finally:
-        if should_close_client:
-            await http_client.aclose()
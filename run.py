@@ -5,109 +5,94 @@ Main entry point for the Tourist Guide Bot.
 import asyncio
 from aiogram import Bot, Dispatcher
 from aiogram.types import BotCommand
-from aiogram.fsm.storage.memory import MemoryStorage
-from aiogram.types import Message, CallbackQuery
-from typing import Dict, Any, Callable, Awaitable, Union
 
-from app import logger
+from app import logger, TG_TOKEN, DB_PATH
 from app.handlers import router
-from app.generators import init_http_client, close_http_client
+from app.generators import init_http_client, close_http_client, create_bot_session
 from app.database import BotDatabase
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
-# Database middleware
-class DatabaseMiddleware:
-    """Middleware for injecting database into handler data."""
 
-    def __init__(self, db: BotDatabase):
-        self.db = db
+async def main(session=None):
+    """Initialize and run the main bot.
 
-    async def __call__(
-        self,
-        handler: Callable[
-            [Union[Message, CallbackQuery], Dict[str, Any]], Awaitable[Any]
-        ],
-        event: Union[Message, CallbackQuery],
-        data: Dict[str, Any],
-    ) -> Any:
-        # Inject database into handler data
-        data["db"] = self.db
-        return await handler(event, data)
-
-
-async def main():
-    """Initialize and run the main bot."""
+    A caller that passes a shared Telegram session also owns the shared
+    HTTP client and closes both itself.
+    """
+    owns_resources = session is None
     try:
-        # Import environment variables
-        import os
-        from dotenv import load_dotenv
-
-        # Load environment variables (redundant but safe)
-        load_dotenv()
-
-        # Fetch required environment variables
-        tg_token = os.getenv("TG_TOKEN")
-
-        if not tg_token:
+        # Environment variables are loaded once when the app package is imported
+        if not TG_TOKEN:
             logger.error("TG_TOKEN environment variable is not set")
             return
 
         # Initialize database
-        db = BotDatabase()
+        db = BotDatabase(db_path=DB_PATH)
 
         # Initialize HTTP client for all API requests
-        await init_http_client()
+        if owns_resources:
+            await init_http_client()
 
-        # Initialize bot and dispatcher with FSM storage
-        bot = Bot(token=tg_token)
-        dp = Dispatcher(storage=MemoryStorage())
-
-        # Create and register database middleware
-        db_middleware = DatabaseMiddleware(db)
+        # Initialize bot and dispatcher. The handlers keep their own state,
+        # so FSM is disabled and no per-chat state is looked up or stored.
+        if owns_resources:
+            session = create_bot_session()
+        bot = Bot(token=TG_TOKEN, session=session)
+        # The database is passed to every handler that takes a db argument
+        dp = Dispatcher(disable_fsm=True, db=db)
 
         # Include router
         dp.include_router(router)
 
-        # Register middleware at dispatcher level
-        dp.message.middleware(db_middleware)
-        dp.callback_query.middleware(db_middleware)  # Also apply to callback queries
-
-        # Set bot commands
-        await bot.set_my_commands(
-            [
-                BotCommand(
-                    command="places",
-                    description="Choose your preferred Points of Interest types",
-                ),
-                BotCommand(
-                    command="languages",
-                    description="Change language / Изменить язык",
-                ),
-            ]
+        # Set bot commands, identify the bot and skip pending updates
+        # concurrently. bot.me() caches the identity, so polling reuses it
+        # instead of calling getMe again.
+        _, me, _ = await asyncio.gather(
+            bot.set_my_commands(
+                [
+                    BotCommand(
+                        command="places",
+                        description="Choose your preferred Points of Interest types",
+                    ),
+                    BotCommand(
+                        command="languages",
+                        description="Change language / Изменить язык",
+                    ),
+                ]
+            ),
+            bot.me(),
+            bot.delete_webhook(drop_pending_updates=True),
         )
-
-        # Log bot info
-        me = await bot.get_me()
-        logger.info(f"Starting bot as @{me.username} (ID: {me.id})")
-
-        # Skip pending updates and start polling
-        await bot.delete_webhook(drop_pending_updates=True)
+        logger.info("Starting bot as @%s (ID: %s)", me.username, me.id)
         logger.info("Bot is running...")
 
         try:
-            await dp.start_polling(bot)
+            await dp.start_polling(
+                bot,
+                close_bot_session=owns_resources,
+                handle_signals=owns_resources,
+            )
         finally:
             # Close the HTTP client properly when bot stops
-            await close_http_client()
+            if owns_resources:
+                await close_http_client()
 
     except Exception as e:
-        logger.error(f"Main bot error: {str(e)}", exc_info=True)
+        logger.error("Main bot error: %s", e, exc_info=True)
 
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        # uvloop's faster event loop when available (it has no Windows build)
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Bot stopped manually.")
     except Exception as e:
-        logger.error(f"An error occurred: {e}", exc_info=True)
+        logger.error("An error occurred: %s", e, exc_info=True)
@@ -8,38 +8,45 @@ import sys
 import os
 import signal
 import logging
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler()],
-)
-logger = logging.getLogger("run_all")
+# The app package loads .env and configures logging once for every entry point
+from app import logger as app_logger
+from app.generators import create_bot_session, init_http_client, close_http_client
 
+logger = app_logger.getChild("run_all")
 
-async def run_main_bot():
+
+def _mask(value):
+    """Mask an environment variable value for logging."""
+    # Маскируем значения для безопасности
+    if not value:
+        return "NOT SET"
+    return f"{value[:4]}***{value[-4:]}" if len(value) > 8 else "***"
+
+
+async def run_main_bot(session):
     """Run the main tourist guide bot."""
     try:
         from run import main as main_bot_main
         logger.info("Starting main tourist guide bot...")
-        await main_bot_main()
+        await main_bot_main(session)
     except Exception as e:
-        logger.error(f"Main bot error: {e}", exc_info=True)
+        logger.error("Main bot error: %s", e, exc_info=True)
 
 
-async def run_admin_bot():
+async def run_admin_bot(session):
     """Run the admin bot."""
     try:
         from admin_bot import main as admin_bot_main
         logger.info("Starting admin bot...")
-        await admin_bot_main()
+        await admin_bot_main(session)
     except Exception as e:
-        logger.error(f"Admin bot error: {e}", exc_info=True)
+        logger.error("Admin bot error: %s", e, exc_info=True)
 
 
 async def main():
@@ -48,62 +55,74 @@ async def main():
     
     # Check for required environment variables (минимальный набор для запуска)
     required_vars = ["TG_TOKEN", "ADMIN_BOT_TOKEN"]
-    missing_vars = [var for var in required_vars if not os.getenv(var)]
+    optional_vars = ["GOOGLE_MAPS_API_KEY", "DEEPSEEK_API_KEY", "YA_SPEECHKIT_API_KEY", "YA_SEARCH_API_KEY"]
+    all_vars = required_vars + optional_vars + ["ADMIN_PASSWORD", "DB_PATH"]
+    env = {var: os.environ.get(var) for var in all_vars}
+
+    missing_vars = [var for var in required_vars if not env[var]]
     
     if missing_vars:
-        logger.error(f"Missing critical environment variables: {', '.join(missing_vars)}")
+        logger.error("Missing critical environment variables: %s", ", ".join(missing_vars))
         logger.error("Please set these variables in Railway Dashboard or your environment")
         sys.exit(1)
     
-    # Проверяем дополнительные переменные (предупреждения, не критичные ошибки)
-    optional_vars = ["GOOGLE_MAPS_API_KEY", "DEEPSEEK_API_KEY", "YA_SPEECHKIT_API_KEY", "YA_SEARCH_API_KEY"]
-    missing_optional = [var for var in optional_vars if not os.getenv(var)]
-    
-    if missing_optional:
-        logger.warning(f"Missing optional environment variables: {', '.join(missing_optional)}")
-        logger.warning("Some features may not work properly without these variables")
+    # Missing optional variables are already reported when app is imported
     
-    # Показываем какие переменные установлены
-    logger.info("Environment variables status:")
-    all_vars = required_vars + optional_vars + ["ADMIN_PASSWORD", "DB_PATH"]
-    for var in all_vars:
-        value = os.getenv(var)
-        if value:
-            # Маскируем значения для безопасности
-            masked_value = f"{value[:4]}***{value[-4:]}" if len(value) > 8 else "***"
-            logger.info(f"  {var}: {masked_value}")
-        else:
-            logger.info(f"  {var}: NOT SET")
+    # Показываем какие переменные установлены. Only on request: set
+    # NEST_BOOT_AUDIT=1 to log the (masked) environment at startup.
+    if os.environ.get("NEST_BOOT_AUDIT") == "1" and logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Environment variables status:\n"
+            + "\n".join(f"  {var}: {_mask(value)}" for var, value in env.items())
+        )
     
+    # Both bots share one Telegram API session and one HTTP client
+    session = create_bot_session()
+    await init_http_client()
+
+    # Run both bots concurrently
+    bots = asyncio.gather(
+        run_main_bot(session),
+        run_admin_bot(session),
+        return_exceptions=True
+    )
+
+    # One handler stops both bots. Each dispatcher would otherwise install
+    # its own and the last one registered would be the only one to fire.
+    loop = asyncio.get_running_loop()
+    handled_signals = []
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, bots.cancel)
+        except NotImplementedError:
+            # Windows event loops have no signal handlers; Ctrl+C still
+            # interrupts asyncio.run there
+            break
+        handled_signals.append(sig)
+
     try:
-        # Run both bots concurrently
-        await asyncio.gather(
-            run_main_bot(),
-            run_admin_bot(),
-            return_exceptions=True
-        )
-    except KeyboardInterrupt:
-        logger.info("Received interrupt signal. Shutting down...")
+        await bots
+    except asyncio.CancelledError:
+        logger.info("Received shutdown signal. Stopping bots...")
     except Exception as e:
-        logger.error(f"Unexpected error: {e}", exc_info=True)
+        logger.error("Unexpected error: %s", e, exc_info=True)
         sys.exit(1)
-
-
-def signal_handler(sig, frame):
-    """Handle shutdown signals gracefully."""
-    logger.info("Received shutdown signal. Stopping bots...")
-    sys.exit(0)
+    finally:
+        for sig in handled_signals:
+            loop.remove_signal_handler(sig)
+        await session.close()
+        await close_http_client()
 
 
 if __name__ == "__main__":
-    # Register signal handlers
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
     try:
-        asyncio.run(main())
+        # uvloop's faster event loop when available (it has no Windows build)
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Bots stopped manually.")
     except Exception as e:
-        logger.error(f"Critical error: {e}", exc_info=True)
+        logger.error("Critical error: %s", e, exc_info=True)
         sys.exit(1)
\ No newline at end of file